@@ -0,0 +1,187 @@
+"""
+Data-prep and CPU throughput for the fine-tuning notebook:
+
+- tokenizing the dataset with .map() against loading it from tokenize_cached();
+- padding ratio and samples/s of training steps with random batches (the
+  Trainer default) against group_by_length batches (the Trainer's
+  LengthGroupedSampler);
+- the same for evaluation, in dataset order against sorted by length.
+
+By default an IMDB-like corpus (review lengths drawn from a long-tailed
+distribution) and a small randomly initialised DistilBERT with its own
+WordPiece tokenizer are built under bench_model/, so this runs offline;
+pass --dataset imdb --model distilbert-base-uncased for the real thing.
+
+    python benchmark_finetune_data.py --samples 4000 --steps 30
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import torch
+from datasets import Dataset, DatasetDict
+from torch.utils.data import DataLoader, RandomSampler, SequentialSampler
+from transformers import (
+    AutoModelForSequenceClassification,
+    AutoTokenizer,
+    DataCollatorWithPadding,
+)
+from transformers.trainer_pt_utils import LengthGroupedSampler
+
+from finetune_data import padding_ratio, sort_by_length, tokenize_cached
+
+BENCH_MODEL = "bench_model/distilbert-small"
+WORDS = (
+    "the movie film plot acting actor actress story scene director great bad "
+    "boring brilliant terrible wonderful awful funny sad ending character music "
+    "script camera was is and but not very really quite too so a an of to in"
+).split()
+
+
+def build_bench_model(path):
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors, trainers
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, PreTrainedTokenizerFast
+
+    wordpiece = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    wordpiece.normalizer = normalizers.BertNormalizer(lowercase=True)
+    wordpiece.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    specials = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    wordpiece.train_from_iterator(
+        [" ".join(WORDS)] * 20, trainers.WordPieceTrainer(vocab_size=500, special_tokens=specials)
+    )
+    wordpiece.post_processor = processors.BertProcessing(("[SEP]", 3), ("[CLS]", 2))
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=wordpiece,
+        pad_token="[PAD]", unk_token="[UNK]", cls_token="[CLS]", sep_token="[SEP]",
+        mask_token="[MASK]", model_max_length=512,
+    )
+    config = DistilBertConfig(
+        vocab_size=tokenizer.vocab_size, dim=256, hidden_dim=1024, n_layers=3, n_heads=4,
+        num_labels=2,
+    )
+    torch.manual_seed(0)
+    DistilBertForSequenceClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def synthetic_reviews(n, rng):
+    # Word counts roughly like IMDB: median ~170, long tail past 512 tokens
+    rows = {"text": [], "label": []}
+    for _ in range(n):
+        length = min(int(rng.lognormvariate(5.1, 0.7)), 2000)
+        rows["text"].append(" ".join(rng.choice(WORDS) for _ in range(length)))
+        rows["label"].append(rng.randint(0, 1))
+    return Dataset.from_dict(rows)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(model, dataset, collator, batches, steps, train):
+    """samples/s over `steps` batches (forward + backward + step when training)"""
+    optimizer = torch.optim.AdamW(model.parameters(), lr=2e-5) if train else None
+    model.train(train)
+    dataset = dataset.remove_columns("length")  # the Trainer drops it too
+    loader = DataLoader(dataset, batch_sampler=batches[:steps], collate_fn=collator)
+    samples = 0
+    start = time.perf_counter()
+    for batch in loader:
+        if train:
+            loss = model(**batch).loss
+            loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+        else:
+            with torch.inference_mode():
+                model(**batch)
+        samples += len(batch["labels"])
+    return samples / (time.perf_counter() - start)
+
+
+def chunk(indices, batch_size):
+    return [indices[i : i + batch_size] for i in range(0, len(indices), batch_size)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--dataset", default=None, help="e.g. imdb; synthetic reviews by default")
+    parser.add_argument("--samples", type=int, default=4000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=30)
+    args = parser.parse_args()
+
+    model_name = args.model
+    if model_name is None:
+        model_name = BENCH_MODEL
+        if not os.path.exists(BENCH_MODEL):
+            build_bench_model(BENCH_MODEL)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=2)
+    collator = DataCollatorWithPadding(tokenizer=tokenizer)
+
+    if args.dataset:
+        from datasets import load_dataset
+
+        full = load_dataset(args.dataset)
+        raw = DatasetDict(
+            {split: full[split].shuffle(seed=0).select(range(args.samples)) for split in ("train", "test")}
+        )
+    else:
+        rng = random.Random(42)
+        raw = DatasetDict(
+            {"train": synthetic_reviews(args.samples, rng), "test": synthetic_reviews(args.samples, rng)}
+        )
+
+    cache_dir = tempfile.mkdtemp(prefix="tokenized-bench-")
+    try:
+        _, t_map = timed(lambda: raw.map(lambda b: tokenizer(b["text"], truncation=True), batched=True))
+        _, t_cold = timed(lambda: tokenize_cached(raw, tokenizer, cache_dir=cache_dir))
+        tokenized, t_warm = timed(lambda: tokenize_cached(raw, tokenizer, cache_dir=cache_dir))
+        n = sum(len(split) for split in raw.values())
+        print(f"{n} examples")
+        print(f"{'.map() every run':<32}{t_map:8.2f}s")
+        print(f"{'tokenize_cached, first run':<32}{t_cold:8.2f}s")
+        print(f"{'tokenize_cached, cached':<32}{t_warm:8.2f}s{t_map / t_warm:8.0f}x")
+
+        train, test = tokenized["train"], tokenized["test"]
+        bs = args.batch_size
+        generator = torch.Generator().manual_seed(0)
+        random_batches = chunk(list(RandomSampler(train, generator=generator)), bs)
+        grouped = LengthGroupedSampler(bs, lengths=train["length"], generator=generator)
+        grouped_batches = chunk(list(grouped), bs)
+
+        sorted_test = sort_by_length(test)
+        eval_plain = chunk(list(SequentialSampler(test)), bs)
+        eval_sorted = chunk(list(SequentialSampler(sorted_test)), bs)
+
+        print(f"\nbatch size {bs}, {args.steps} batches timed per row")
+        print(f"{'':<32}{'padding':>8}{'samples/s':>11}")
+        comparisons = [
+            (True, [("train, random batches", train, random_batches),
+                    ("train, group_by_length", train, grouped_batches)]),
+            (False, [("eval, dataset order", test, eval_plain),
+                     ("eval, sorted by length", sorted_test, eval_sorted)]),
+        ]
+        for is_train, rows in comparisons:
+            baseline = None
+            for name, dataset, batches in rows:
+                ratio = padding_ratio(dataset["length"], batches)
+                # Time batches spread over the whole epoch, not just its start
+                stride = batches[:: max(len(batches) // args.steps, 1)]
+                rate = run(model, dataset, collator, stride, args.steps, is_train)
+                speedup = f"{rate / baseline:7.1f}x" if baseline else ""
+                baseline = baseline or rate
+                print(f"{name:<32}{ratio:8.1%}{rate:11.1f}{speedup}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
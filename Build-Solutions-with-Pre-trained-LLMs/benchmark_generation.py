@@ -0,0 +1,179 @@
+"""
+CPU generation throughput and time to first token: model.generate one
+prompt at a time (what the notebook's pipeline does) against
+GenerationServer with continuous batching, with and without reuse of the
+shared system prompt's KV cache.
+
+Before timing anything, it checks that the server's greedy output is
+token-for-token the same as model.generate for every prompt, while the
+prompts run batched together.
+
+By default a small randomly initialised GPT-2 with a byte-level BPE
+tokenizer is built under bench_model/, so this runs offline; pass
+--model gpt2 (or any causal LM) for a real one.
+
+    python benchmark_generation.py --requests 32
+"""
+import argparse
+import os
+import random
+import time
+
+import torch
+from transformers.generation.streamers import BaseStreamer
+
+from generation_server import GenerationServer
+
+BENCH_MODEL = "bench_model/gpt2-small"
+SYSTEM_PROMPT = (
+    "You are an instructor writing a short test with three questions on earth "
+    "science for middle schoolers. Each question has four options and one correct "
+    "answer. Keep the language simple, cover rocks, weather, oceans and the water "
+    "cycle, and do not repeat a topic.\n"
+)
+TOPICS = ["volcanoes", "rain", "tides", "glaciers", "erosion", "clouds", "earthquakes", "rivers"]
+
+
+def build_bench_model(path):
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    corpus = [SYSTEM_PROMPT] + [f"Question {i}: What causes {t}?" for i in range(1, 4) for t in TOPICS]
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(corpus * 20, vocab_size=800, special_tokens=["<|endoftext|>"])
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=bpe._tokenizer,
+        bos_token="<|endoftext|>", eos_token="<|endoftext|>", unk_token="<|endoftext|>",
+        model_max_length=1024,
+    )
+    config = GPT2Config(
+        vocab_size=tokenizer.vocab_size, n_positions=1024, n_embd=256, n_layer=4, n_head=4,
+        bos_token_id=0, eos_token_id=0,
+    )
+    torch.manual_seed(0)
+    GPT2LMHeadModel(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+class FirstTokenTimer(BaseStreamer):
+    """Records when generate() produces its first new token"""
+
+    def __init__(self):
+        self.calls = 0
+        self.first_token_at = None
+
+    def put(self, value):
+        self.calls += 1
+        if self.calls == 2:  # the first call carries the prompt
+            self.first_token_at = time.perf_counter()
+
+    def end(self):
+        pass
+
+
+def make_requests(n, rng):
+    return [
+        (f"Question {rng.randint(1, 3)}: What causes {rng.choice(TOPICS)}?", rng.randint(16, 96))
+        for _ in range(n)
+    ]
+
+
+def summarize(name, tokens, elapsed, ttfts, batch=None, baseline=None):
+    ttfts = sorted(ttfts)
+    p50 = ttfts[len(ttfts) // 2] * 1e3
+    p95 = ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))] * 1e3
+    rate = tokens / elapsed
+    batch = f"{batch:8.1f}" if batch is not None else f"{'':8}"
+    speedup = f"{rate / baseline:7.1f}x" if baseline else ""
+    print(f"{name:<34}{rate:10.1f}{p50:10.0f}{p95:10.0f}{batch}{speedup}")
+    return rate
+
+
+def run_sequential(server, requests):
+    """model.generate per request, in arrival order (all arrive at once)"""
+    tokenizer, model = server.tokenizer, server.model
+    start = time.perf_counter()
+    tokens, ttfts = 0, []
+    for prompt, max_new_tokens in requests:
+        ids = tokenizer(SYSTEM_PROMPT + prompt, return_tensors="pt")["input_ids"]
+        timer = FirstTokenTimer()
+        with torch.inference_mode():
+            out = model.generate(
+                ids, attention_mask=torch.ones_like(ids), max_new_tokens=max_new_tokens,
+                do_sample=False, streamer=timer,
+                pad_token_id=tokenizer.eos_token_id,
+            )
+        tokens += out.shape[1] - ids.shape[1]
+        ttfts.append(timer.first_token_at - start)
+    return tokens, time.perf_counter() - start, ttfts
+
+
+def run_server(server, requests):
+    start = time.perf_counter()
+    futures = [
+        server.submit(prompt, system_prompt=SYSTEM_PROMPT, max_new_tokens=n) for prompt, n in requests
+    ]
+    results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    return sum(len(r["token_ids"]) for r in results), elapsed, [r["ttft"] for r in results]
+
+
+def check_matches_generate(server, requests):
+    futures = [server.submit(p, system_prompt=s, max_new_tokens=n) for s, p, n in requests]
+    for (system, prompt, n), future in zip(requests, futures):
+        ids = server.tokenizer(system + prompt, return_tensors="pt")["input_ids"]
+        with torch.inference_mode():
+            out = server.model.generate(
+                ids, attention_mask=torch.ones_like(ids), max_new_tokens=n, do_sample=False,
+                pad_token_id=server.tokenizer.eos_token_id,
+            )
+        expected = out[0, ids.shape[1]:].tolist()
+        if expected and expected[-1] == server.eos_token_id:
+            expected = expected[:-1]
+        got = future.result()["token_ids"]
+        assert got == expected, (prompt, got, expected)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    model_name = args.model
+    if model_name is None:
+        model_name = BENCH_MODEL
+        if not os.path.exists(BENCH_MODEL):
+            build_bench_model(BENCH_MODEL)
+    torch.manual_seed(0)
+    rng = random.Random(42)
+    requests = make_requests(args.requests, rng)
+
+    # The system prompt is tokenized on its own in the server; it ends with a
+    # newline, so the token ids are the same as for the joined text
+    server = GenerationServer(model_name, max_batch_size=8)
+    check = [(SYSTEM_PROMPT if i % 2 else "", p, n) for i, (p, n) in enumerate(requests[:12])]
+    check_matches_generate(server, check)
+    print("Greedy output matches model.generate (batched, with and without system prompt)")
+
+    n_tokens = sum(n for _, n in requests)
+    print(f"{args.requests} requests, {n_tokens} new tokens at most, all submitted at once")
+    print(f"{'':<34}{'tokens/s':>10}{'TTFT p50':>10}{'TTFT p95':>10}{'batch':>8}")
+    print(f"{'':<34}{'':>10}{'(ms)':>10}{'(ms)':>10}")
+    baseline = summarize("model.generate, one at a time", *run_sequential(server, requests))
+    server.close()
+
+    for prefix_cache_size in (0, 16):
+        for batch_size in args.batch_sizes:
+            server = GenerationServer(
+                model_name, max_batch_size=batch_size, prefix_cache_size=prefix_cache_size
+            )
+            tokens, elapsed, ttfts = run_server(server, requests)
+            name = f"server, batch {batch_size}" + (", prefix cache" if prefix_cache_size else "")
+            summarize(name, tokens, elapsed, ttfts, server.stats()["mean_batch_size"], baseline)
+            server.close()
+
+
+if __name__ == "__main__":
+    main()
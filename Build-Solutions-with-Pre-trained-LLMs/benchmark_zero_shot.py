@@ -0,0 +1,116 @@
+"""
+Zero-shot classification throughput on CPU: the transformers pipeline one
+text at a time (as in Text-Classification.ipynb) against ZeroShotService
+at batch sizes 1 to 64, plus a check that both give the same scores.
+
+By default a small randomly initialised BART-MNLI with a byte-level BPE
+tokenizer is built under bench_model/, so this runs offline; pass
+--model facebook/bart-large-mnli for the real one.
+
+    python benchmark_zero_shot.py --texts 256
+"""
+import argparse
+import os
+import random
+import time
+
+import torch
+import transformers
+
+from zero_shot_service import ZeroShotService
+
+BENCH_MODEL = "bench_model/bart-mnli-small"
+LABELS = ["Iron Deficiency", "Cold and Flu", "Gastritis", "Migraine", "Allergy"]
+SYMPTOMS = [
+    "anemia", "fatigue", "pale skin", "runny nose", "sore throat", "fever",
+    "stomach pain", "nausea", "bloating", "headache", "sensitivity to light",
+    "sneezing", "itchy eyes", "dizziness", "cold hands", "heartburn",
+]
+
+
+def build_bench_model(path):
+    from tokenizers import ByteLevelBPETokenizer, processors
+    from transformers import BartConfig, BartForSequenceClassification, PreTrainedTokenizerFast
+
+    corpus = [f"Symptom: {s}. This example is {l}." for s in SYMPTOMS for l in LABELS]
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        corpus * 20, vocab_size=600, special_tokens=["<s>", "<pad>", "</s>", "<unk>"]
+    )
+    # BART's pair layout: <s> A </s></s> B </s>
+    bpe.post_processor = processors.RobertaProcessing(("</s>", 2), ("<s>", 0))
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=bpe._tokenizer,
+        bos_token="<s>", pad_token="<pad>", eos_token="</s>", unk_token="<unk>",
+        model_max_length=1024,
+    )
+    config = BartConfig(
+        vocab_size=tokenizer.vocab_size,
+        d_model=256, encoder_layers=3, decoder_layers=3,
+        encoder_attention_heads=4, decoder_attention_heads=4,
+        encoder_ffn_dim=1024, decoder_ffn_dim=1024,
+        max_position_embeddings=1024,
+        pad_token_id=1, bos_token_id=0, eos_token_id=2,
+        num_labels=3,
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2},
+    )
+    torch.manual_seed(0)
+    BartForSequenceClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def make_texts(n, rng):
+    texts = []
+    for _ in range(n):
+        symptoms = rng.sample(SYMPTOMS, rng.randint(1, 6))
+        texts.append("Symptom: " + ", ".join(symptoms) + "." * rng.randint(1, 3))
+    return texts
+
+
+def throughput(fn, texts):
+    start = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 32, 64])
+    args = parser.parse_args()
+
+    model_name = args.model
+    if model_name is None:
+        model_name = BENCH_MODEL
+        if not os.path.exists(BENCH_MODEL):
+            build_bench_model(BENCH_MODEL)
+
+    rng = random.Random(42)
+    texts = make_texts(args.texts, rng)
+    service = ZeroShotService(model_name)
+    pipe = transformers.pipeline("zero-shot-classification", model=model_name, device="cpu")
+
+    # Same scores as the pipeline
+    for multi_label in (False, True):
+        ours = service.classify(texts[:20], LABELS, batch_size=8, multi_label=multi_label)
+        for text, result in zip(texts[:20], ours):
+            expected = pipe(text, candidate_labels=LABELS, multi_label=multi_label)
+            got = dict(zip(result["labels"], result["scores"]))
+            want = dict(zip(expected["labels"], expected["scores"]))
+            assert all(abs(got[l] - want[l]) < 1e-4 for l in LABELS), (text, got, want)
+    print("Scores match the pipeline (single- and multi-label)")
+
+    baseline = throughput(
+        lambda ts: [pipe(t, candidate_labels=LABELS) for t in ts], texts[:64]
+    )
+    print(f"{len(LABELS)} labels, {args.texts} texts")
+    print(f"{'pipeline, one text per call':<30}{baseline:>8.1f} texts/s")
+    for batch_size in args.batch_sizes:
+        rate = throughput(lambda ts: service.classify(ts, LABELS, batch_size=batch_size), texts)
+        print(f"{f'service, batch size {batch_size}':<30}{rate:>8.1f} texts/s{rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
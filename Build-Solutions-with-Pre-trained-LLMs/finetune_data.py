@@ -0,0 +1,94 @@
+"""
+Data preparation for Fine_tuning_an_LLM.ipynb.
+
+tokenize_cached() tokenizes a DatasetDict once and saves it as Arrow under
+tokenized_cache/<key>. The key hashes the tokenizer (name and, for fast
+tokenizers, its full serialized vocabulary/normalizer), the truncation
+settings and the dataset fingerprints. Later runs memory-map the cached
+splits instead of running .map() again. A "length" column is added.
+
+For training batches of similar length, use the Trainer's own grouping,
+TrainingArguments(group_by_length=True, length_column_name="length").
+sort_by_length() orders an evaluation split (order does not matter for the
+metrics).
+
+    tokenized = tokenize_cached(imdb, tokenizer)
+    trainer = Trainer(
+        args=TrainingArguments(..., group_by_length=True, length_column_name="length"),
+        train_dataset=tokenized["train"],
+        eval_dataset=sort_by_length(tokenized["test"]),
+        ...
+    )
+"""
+import hashlib
+import json
+import os
+
+from datasets import DatasetDict, load_from_disk
+
+CACHE_DIR = "tokenized_cache"
+
+
+def cache_key(dataset, tokenizer, max_length, text_column):
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            {
+                "tokenizer": tokenizer.name_or_path,
+                "max_length": max_length,
+                "model_max_length": tokenizer.model_max_length,
+                "text_column": text_column,
+                "splits": {name: split._fingerprint for name, split in dataset.items()},
+            },
+            sort_keys=True,
+        ).encode()
+    )
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        h.update(backend.to_str().encode())
+    return h.hexdigest()[:16]
+
+
+def tokenize_cached(dataset, tokenizer, max_length=None, text_column="text",
+                    cache_dir=CACHE_DIR, num_proc=None):
+    """Tokenized copy of `dataset` (a DatasetDict), from the Arrow cache when possible."""
+    path = os.path.join(cache_dir, cache_key(dataset, tokenizer, max_length, text_column))
+    if os.path.exists(os.path.join(path, "dataset_dict.json")):
+        return load_from_disk(path)
+
+    def preprocess(examples):
+        encoded = tokenizer(examples[text_column], truncation=True, max_length=max_length)
+        encoded["length"] = [len(ids) for ids in encoded["input_ids"]]
+        return encoded
+
+    tokenized = DatasetDict(
+        {
+            name: split.map(
+                preprocess,
+                batched=True,
+                num_proc=num_proc,
+                remove_columns=[text_column],
+                desc=f"Tokenizing {name}",
+            )
+            for name, split in dataset.items()
+        }
+    )
+    tmp = path + ".tmp"
+    tokenized.save_to_disk(tmp)
+    os.replace(tmp, path)
+    # Reload so the splits are memory-mapped from the cache, as on later runs
+    return load_from_disk(path)
+
+
+def sort_by_length(dataset, column="length"):
+    return dataset.sort(column)
+
+
+def padding_ratio(lengths, batches):
+    """Share of padding tokens when each batch is padded to its longest example"""
+    real = padded = 0
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        real += sum(batch_lengths)
+        padded += max(batch_lengths) * len(batch_lengths)
+    return 1 - real / padded if padded else 0.0
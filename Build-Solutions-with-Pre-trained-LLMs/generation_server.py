@@ -0,0 +1,394 @@
+"""
+Continuous-batching text generation on CPU for the Text-Generation flow.
+
+pipeline("text-generation") generates for one prompt at a time. With
+GenerationServer, request threads submit prompts and wait on a Future,
+and a single worker thread runs the model over every active sequence at once:
+
+- continuous batching: after each decode step, finished sequences leave the
+  batch and queued prompts join it (up to max_batch_size), so short
+  answers never wait for long ones;
+- sequences of different lengths share one KV cache, left-padded and
+  masked, with explicit position ids per sequence;
+- prefix reuse: the KV cache of a system prompt is computed once and kept
+  (LRU), so requests that share it only prefill their own text;
+- stats(): generated tokens/s, time to first token and batch sizes.
+
+An error fails the requests it touches (one prompt for a prefill error, the
+running batch for a decode error); the worker keeps serving the queue.
+close() stops the worker and fails whatever is still queued.
+
+The model is loaded with AutoModelForCausalLM, as in the notebook, or the
+notebook's own model and tokenizer are passed in:
+
+    server = GenerationServer("tiiuae/falcon-7b-instruct")
+    future = server.submit("Question 1:", system_prompt=INSTRUCTOR, max_new_tokens=64)
+    print(future.result()["text"])
+    server.close()
+"""
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache
+
+
+def _cache_tensors(cache):
+    """[(keys, values)] per layer, each [batch, heads, length, head_dim]"""
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))
+
+
+def _make_cache(tensors):
+    cache = DynamicCache()
+    for layer_idx, (keys, values) in enumerate(tensors):
+        cache.update(keys, values, layer_idx)
+    return cache
+
+
+def _left_pad(tensor, width, dim):
+    if width == 0:
+        return tensor
+    shape = list(tensor.shape)
+    shape[dim] = width
+    return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+
+class _Sequence:
+    def __init__(self, prompt_ids, prefix_ids, params, future):
+        self.prompt_ids = prompt_ids
+        self.prefix_ids = prefix_ids
+        self.params = params
+        self.future = future
+        self.submitted = time.perf_counter()
+        self.first_token_at = None
+        self.generated = []
+        self.reused = 0  # prompt tokens whose KV came from the prefix cache
+
+    @property
+    def length(self):
+        """Tokens in this sequence's KV cache, or next position id"""
+        return len(self.prefix_ids) + len(self.prompt_ids) + len(self.generated) - 1
+
+
+class GenerationServer:
+    def __init__(self, model_name, max_batch_size=8, max_new_tokens=128, prefix_cache_size=16,
+                 device="cpu", model=None, tokenizer=None, **model_kwargs):
+        # An already loaded model/tokenizer (e.g. the notebook's) can be passed in
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_name)
+        if model is None:
+            model = AutoModelForCausalLM.from_pretrained(model_name, **model_kwargs).to(device)
+        self.model = model.eval()
+        self.device = self.model.device
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.max_length = getattr(self.model.config, "max_position_embeddings", None) or getattr(
+            self.model.config, "n_positions", None
+        )
+        self.eos_token_id = self.tokenizer.eos_token_id
+
+        self._queue = queue.Queue()
+        self._prefix_cache_size = prefix_cache_size
+        self._lock = threading.Lock()  # guards the counters, read by stats()
+        self._ttft = deque(maxlen=1000)
+        self._counts = {
+            "requests": 0, "generated_tokens": 0, "decode_steps": 0, "batched_rows": 0,
+            "prefix_hits": 0, "prefix_misses": 0, "busy_seconds": 0.0,
+        }
+        # Owned by the worker thread
+        self._prefixes = OrderedDict()  # system prompt token ids -> (KV tensors, last logits)
+        self._active = []
+        self._admitting = None  # taken off the queue, not yet in the batch
+        self._cache = None
+        self._mask = None
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="generate", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt, system_prompt="", max_new_tokens=None, do_sample=False,
+               top_k=0, temperature=1.0):
+        """Queue a prompt; the Future's result is a dict with the generated text."""
+        if self._closed.is_set():
+            raise RuntimeError("GenerationServer is closed")
+        prefix_ids = ()
+        if system_prompt:
+            prefix_ids = tuple(self.tokenizer(system_prompt)["input_ids"])
+        # Without a system prompt the prompt itself carries the special tokens
+        prompt_ids = self.tokenizer(prompt, add_special_tokens=not prefix_ids)["input_ids"]
+        if not prefix_ids and not prompt_ids:
+            raise ValueError("empty prompt")
+        params = {
+            "max_new_tokens": max_new_tokens or self.max_new_tokens,
+            "do_sample": do_sample,
+            "top_k": top_k,
+            "temperature": temperature,
+        }
+        future = Future()
+        self._queue.put(_Sequence(list(prompt_ids), prefix_ids, params, future))
+        return future
+
+    def generate(self, prompt, timeout=None, **kwargs):
+        return self.submit(prompt, **kwargs).result(timeout=timeout)
+
+    def close(self, timeout=None):
+        """Stop the worker after its current step; queued requests fail."""
+        self._closed.set()
+        self._queue.put(None)  # wakes a worker blocked on an empty queue
+        self._worker.join(timeout)
+
+    # Prefill
+
+    def _forward(self, input_ids, cache, start):
+        """Run `input_ids` (one sequence) after `start` cached tokens"""
+        ids = torch.tensor([input_ids], device=self.device)
+        out = self.model(
+            input_ids=ids,
+            attention_mask=torch.ones((1, start + len(input_ids)), dtype=torch.long, device=self.device),
+            position_ids=torch.arange(start, start + len(input_ids), device=self.device)[None],
+            past_key_values=cache if cache is not None else DynamicCache(),
+            use_cache=True,
+        )
+        return out.past_key_values, out.logits[0, -1]
+
+    def _prefix(self, prefix_ids):
+        """KV tensors and last logits of a system prompt, computed once"""
+        entry = self._prefixes.get(prefix_ids)
+        with self._lock:
+            self._counts["prefix_hits" if entry is not None else "prefix_misses"] += 1
+        if entry is not None:
+            self._prefixes.move_to_end(prefix_ids)
+            return entry
+        cache, logits = self._forward(list(prefix_ids), None, 0)
+        entry = (_cache_tensors(cache), logits)
+        self._prefixes[prefix_ids] = entry
+        while len(self._prefixes) > self._prefix_cache_size:
+            self._prefixes.popitem(last=False)
+        return entry
+
+    def _prefill(self, seq):
+        """KV tensors for the whole prompt; the first generated token is chosen here"""
+        if seq.prefix_ids:
+            if seq.prefix_ids in self._prefixes:
+                seq.reused = len(seq.prefix_ids)
+            prefix_kv, logits = self._prefix(seq.prefix_ids)
+            if seq.prompt_ids:
+                # The layers' update() concatenates, so the cached prefix is not modified
+                cache, logits = self._forward(
+                    seq.prompt_ids, _make_cache(prefix_kv), len(seq.prefix_ids)
+                )
+                kv = _cache_tensors(cache)
+            else:
+                kv = prefix_kv
+        else:
+            cache, logits = self._forward(seq.prompt_ids, None, 0)
+            kv = _cache_tensors(cache)
+        self._append_token(seq, self._sample(logits[None], [seq])[0])
+        return kv
+
+    # Batch management
+
+    def _join(self, seq, kv):
+        """Add a prefilled sequence to the running batch"""
+        length = kv[0][0].shape[2]
+        if not self._active:
+            self._cache = kv
+            self._mask = torch.ones((1, length), dtype=torch.long, device=self.device)
+        else:
+            width = max(self._mask.shape[1], length)
+            batch_pad = width - self._mask.shape[1]
+            new_pad = width - length
+            self._cache = [
+                (
+                    torch.cat([_left_pad(k, batch_pad, 2), _left_pad(nk, new_pad, 2)]),
+                    torch.cat([_left_pad(v, batch_pad, 2), _left_pad(nv, new_pad, 2)]),
+                )
+                for (k, v), (nk, nv) in zip(self._cache, kv)
+            ]
+            new_mask = torch.ones((1, length), dtype=torch.long, device=self.device)
+            self._mask = torch.cat([_left_pad(self._mask, batch_pad, 1), _left_pad(new_mask, new_pad, 1)])
+        self._active.append(seq)
+
+    def _retire(self, finished):
+        """Drop finished sequences and the padding columns nobody needs any more"""
+        keep = [i for i, seq in enumerate(self._active) if seq not in finished]
+        self._active = [self._active[i] for i in keep]
+        if not self._active:
+            self._cache = self._mask = None
+            return
+        index = torch.tensor(keep, device=self.device)
+        self._mask = self._mask[index]
+        start = int(self._mask.any(dim=0).nonzero()[0])
+        self._mask = self._mask[:, start:]
+        self._cache = [(k[index, :, start:], v[index, :, start:]) for k, v in self._cache]
+
+    def _sample(self, logits, seqs):
+        tokens = logits.argmax(dim=-1).tolist()
+        for row, seq in enumerate(seqs):
+            params = seq.params
+            if not params["do_sample"]:
+                continue
+            scores = logits[row].float() / max(params["temperature"], 1e-5)
+            if params["top_k"]:
+                threshold = scores.topk(min(params["top_k"], scores.shape[-1])).values[-1]
+                scores = scores.masked_fill(scores < threshold, float("-inf"))
+            tokens[row] = int(torch.multinomial(scores.softmax(-1), 1))
+        return tokens
+
+    def _append_token(self, seq, token):
+        if seq.first_token_at is None:
+            seq.first_token_at = time.perf_counter()
+        seq.generated.append(token)
+
+    def _done(self, seq):
+        return (
+            seq.generated[-1] == self.eos_token_id
+            or len(seq.generated) >= seq.params["max_new_tokens"]
+            # The next input token would get a position the model does not have
+            or (self.max_length is not None and seq.length >= self.max_length)
+        )
+
+    def _finish(self, seq):
+        now = time.perf_counter()
+        tokens = seq.generated
+        if tokens and tokens[-1] == self.eos_token_id:
+            tokens = tokens[:-1]
+        ttft = seq.first_token_at - seq.submitted
+        with self._lock:
+            self._ttft.append(ttft)
+            self._counts["requests"] += 1
+            self._counts["generated_tokens"] += len(seq.generated)
+        seq.future.set_result({
+            "text": self.tokenizer.decode(tokens, skip_special_tokens=True),
+            "token_ids": tokens,
+            "prompt_tokens": len(seq.prefix_ids) + len(seq.prompt_ids),
+            "reused_prefix_tokens": seq.reused,
+            "ttft": ttft,
+            "latency": now - seq.submitted,
+        })
+
+    def _admit(self):
+        """Prefill queued prompts into free batch slots"""
+        while len(self._active) < self.max_batch_size:
+            try:
+                # Nothing to decode: wait for work instead of spinning
+                seq = self._queue.get() if not self._active else self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if seq is None:  # close()
+                return
+            if not seq.future.set_running_or_notify_cancel():
+                continue
+            self._admitting = seq
+            start = time.perf_counter()
+            try:
+                with torch.inference_mode():
+                    kv = self._prefill(seq)
+            except Exception as e:
+                self._fail([seq], e)
+                continue
+            finally:
+                self._add_busy(start)
+            if self._done(seq):
+                self._finish(seq)
+            else:
+                self._join(seq, kv)
+            self._admitting = None
+
+    def _add_busy(self, start):
+        with self._lock:
+            self._counts["busy_seconds"] += time.perf_counter() - start
+
+    def _step(self):
+        """One decode step for every active sequence"""
+        input_ids = torch.tensor([[seq.generated[-1]] for seq in self._active], device=self.device)
+        position_ids = torch.tensor([[seq.length] for seq in self._active], device=self.device)
+        ones = torch.ones((len(self._active), 1), dtype=torch.long, device=self.device)
+        self._mask = torch.cat([self._mask, ones], dim=1)
+        out = self.model(
+            input_ids=input_ids,
+            attention_mask=self._mask,
+            position_ids=position_ids,
+            past_key_values=_make_cache(self._cache),
+            use_cache=True,
+        )
+        self._cache = _cache_tensors(out.past_key_values)
+        tokens = self._sample(out.logits[:, -1], self._active)
+        finished = []
+        for seq, token in zip(self._active, tokens):
+            self._append_token(seq, token)
+            if self._done(seq):
+                finished.append(seq)
+        with self._lock:
+            self._counts["decode_steps"] += 1
+            self._counts["batched_rows"] += len(self._active)
+        for seq in finished:
+            self._finish(seq)
+        if finished:
+            self._retire(finished)
+
+    def _fail(self, seqs, error):
+        for seq in seqs:
+            # A sequence may already have its result (finished earlier in the step)
+            if seq is not None and not seq.future.done():
+                seq.future.set_exception(error)
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                self._admit()
+                if not self._active:
+                    continue
+                start = time.perf_counter()
+                try:
+                    with torch.inference_mode():
+                        self._step()
+                finally:
+                    self._add_busy(start)
+            except Exception as e:
+                # Fail what was in flight and start over with an empty batch
+                self._fail(self._active + [self._admitting], e)
+                self._active, self._admitting, self._cache, self._mask = [], None, None, None
+
+        closed = RuntimeError("GenerationServer is closed")
+        self._fail(self._active, closed)
+        self._active, self._cache, self._mask = [], None, None
+        while True:
+            try:
+                seq = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if seq is not None:
+                self._fail([seq], closed)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            ttft = sorted(self._ttft)
+        busy = counts.pop("busy_seconds")
+        rows = counts.pop("batched_rows")
+        counts["tokens_per_second"] = round(counts["generated_tokens"] / busy, 1) if busy else 0.0
+        counts["mean_batch_size"] = round(rows / counts["decode_steps"], 2) if counts["decode_steps"] else 0.0
+        counts["queued"] = self._queue.qsize()
+        if ttft:
+            counts["ttft_p50_ms"] = round(ttft[len(ttft) // 2] * 1e3, 1)
+            counts["ttft_p95_ms"] = round(ttft[min(len(ttft) - 1, int(len(ttft) * 0.95))] * 1e3, 1)
+        return counts
+
+
+if __name__ == "__main__":
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "tiiuae/falcon-7b-instruct"
+    server = GenerationServer(model_name, max_new_tokens=100)
+    system = "You are an instructor writing a short test on earth science for middle schoolers.\n"
+    futures = [
+        server.submit(f"Question {i}:", system_prompt=system, do_sample=True, top_k=10)
+        for i in range(1, 4)
+    ]
+    for future in futures:
+        print(future.result()["text"])
+    print(server.stats())
+    server.close()
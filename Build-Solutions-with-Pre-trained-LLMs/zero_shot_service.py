@@ -0,0 +1,143 @@
+"""
+Batched zero-shot classification with an NLI model (bart-large-mnli).
+
+The transformers pipeline classifies one text at a time, and for every text
+it re-tokenizes each "This example is {label}." hypothesis. ZeroShotService
+takes many texts and one label set:
+
+- hypotheses are tokenized once per label set and cached;
+- each premise is tokenized once (without special tokens), and the
+  (premise, hypothesis) pairs are assembled from token ids, using the
+  special-token layout the tokenizer itself produces for a pair;
+- texts are sorted by length and batched, so each batch is padded only to
+  its own longest pair (length bucketing + dynamic padding).
+
+Scores are the same as the pipeline's (softmax of the entailment logits
+over the labels, or per label with multi_label=True), and results come
+back in input order in the pipeline's {"sequence", "labels", "scores"} form.
+
+    python zero_shot_service.py texts.txt "Iron Deficiency" "Cold and Flu" "Gastritis"
+"""
+import json
+import sys
+from functools import lru_cache
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+DEFAULT_MODEL = "facebook/bart-large-mnli"
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+class ZeroShotService:
+    def __init__(self, model_name=DEFAULT_MODEL, hypothesis_template=HYPOTHESIS_TEMPLATE,
+                 max_length=None, device="cpu"):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.to(device).eval()
+        self.device = device
+        self.hypothesis_template = hypothesis_template
+        self.max_length = min(max_length or self.tokenizer.model_max_length, 1024)
+
+        label2id = {k.lower(): v for k, v in self.model.config.label2id.items()}
+        self.entailment_id = next(
+            (i for label, i in label2id.items() if label.startswith("entail")), -1
+        )
+        self.contradiction_id = -1 if self.entailment_id == 0 else 0
+        self.pad_id = self.tokenizer.pad_token_id
+        if self.pad_id is None:
+            self.pad_id = self.tokenizer.eos_token_id
+        self._pair_layout = self._probe_pair_layout()
+        self._hypotheses = lru_cache(maxsize=64)(self._tokenize_hypotheses)
+
+    def _probe_pair_layout(self):
+        """
+        Special tokens before, between and after the two sequences of a pair,
+        read from one encoding (e.g. <s> A </s></s> B </s> for BART).
+        """
+        encoding = self.tokenizer("a", "b")
+        ids = encoding["input_ids"]
+        sequence_ids = encoding.sequence_ids(0)
+        first = [i for i, s in enumerate(sequence_ids) if s == 0]
+        second = [i for i, s in enumerate(sequence_ids) if s == 1]
+        return (
+            ids[: first[0]],
+            ids[first[-1] + 1 : second[0]],
+            ids[second[-1] + 1 :],
+        )
+
+    def _tokenize_hypotheses(self, labels):
+        hypotheses = [self.hypothesis_template.format(label) for label in labels]
+        return self.tokenizer(hypotheses, add_special_tokens=False)["input_ids"]
+
+    def _encode_batch(self, premises, hypotheses):
+        """Padded model inputs for every (premise, hypothesis) pair"""
+        prefix, middle, suffix = self._pair_layout
+        rows, first_lengths = [], []
+        for premise in premises:
+            for hypothesis in hypotheses:
+                rows.append(prefix + premise + middle + hypothesis + suffix)
+                first_lengths.append(len(prefix) + len(premise) + len(middle))
+        width = max(len(row) for row in rows)
+        input_ids = torch.full((len(rows), width), self.pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for i, row in enumerate(rows):
+            input_ids[i, : len(row)] = torch.tensor(row)
+            attention_mask[i, : len(row)] = 1
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.tokenizer.model_input_names:
+            # BERT-style models: segment 1 is the hypothesis and its end token
+            token_type_ids = torch.zeros_like(input_ids)
+            for i, (row, first) in enumerate(zip(rows, first_lengths)):
+                token_type_ids[i, first : len(row)] = 1
+            inputs["token_type_ids"] = token_type_ids
+        return {name: tensor.to(self.device) for name, tensor in inputs.items()}
+
+    def _scores(self, logits, n_labels, multi_label):
+        logits = logits.float().reshape(-1, n_labels, logits.shape[-1])
+        if multi_label or n_labels == 1:
+            pair = logits[..., [self.contradiction_id, self.entailment_id]]
+            return pair.softmax(-1)[..., 1]
+        return logits[..., self.entailment_id].softmax(-1)
+
+    def classify(self, texts, labels, batch_size=16, multi_label=False):
+        """Classify `texts` against `labels`; one result dict per text, in order"""
+        if isinstance(texts, str):
+            texts = [texts]
+        labels = tuple(labels)
+        hypotheses = self._hypotheses(labels)
+
+        # Premises are truncated so that the longest hypothesis always fits
+        special = sum(len(part) for part in self._pair_layout)
+        budget = self.max_length - special - max(len(h) for h in hypotheses)
+        premises = self.tokenizer(
+            list(texts), add_special_tokens=False, truncation=True, max_length=budget
+        )["input_ids"]
+
+        # Length bucketing: similar lengths share a batch and its padding
+        order = sorted(range(len(texts)), key=lambda i: len(premises[i]), reverse=True)
+        results = [None] * len(texts)
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                batch = order[start : start + batch_size]
+                inputs = self._encode_batch([premises[i] for i in batch], hypotheses)
+                logits = self.model(**inputs).logits
+                scores = self._scores(logits, len(labels), multi_label).cpu()
+                for row, i in enumerate(batch):
+                    ranked = scores[row].argsort(descending=True).tolist()
+                    results[i] = {
+                        "sequence": texts[i],
+                        "labels": [labels[j] for j in ranked],
+                        "scores": [float(scores[row, j]) for j in ranked],
+                    }
+        return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: python zero_shot_service.py texts.txt LABEL [LABEL ...]")
+    with open(sys.argv[1], encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    service = ZeroShotService()
+    for result in service.classify(lines, sys.argv[2:], batch_size=32):
+        print(json.dumps(result))
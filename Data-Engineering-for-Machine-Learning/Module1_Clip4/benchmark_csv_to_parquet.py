@@ -0,0 +1,131 @@
+"""
+Benchmark matrix for csv_to_parquet: conversion time, peak memory (RSS),
+file size and read time for each compression / dictionary / row-group
+setting, next to the notebook's approach (pandas read_csv + to_parquet,
+whole file in memory).
+
+The CSV has the notebook's columns plus a low-cardinality "city" column,
+and it is written in chunks, so it can be made larger than RAM. Every
+conversion runs in its own process, and its RSS is sampled with psutil.
+
+    python benchmark_csv_to_parquet.py --rows 5000000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import psutil
+import pyarrow.parquet as pq
+
+CITIES = ["London", "Paris", "Berlin", "Madrid", "Rome", "Vienna", "Prague", "Lisbon"]
+LOW_CARDINALITY = "name,city"
+SETTINGS = [
+    # (compression, dictionary: all / none / LOW_CARDINALITY columns, row group size)
+    ("snappy", "all", 128 * 1024),
+    ("snappy", "none", 128 * 1024),
+    ("snappy", LOW_CARDINALITY, 128 * 1024),
+    ("zstd", "all", 128 * 1024),
+    ("zstd", "none", 128 * 1024),
+    ("zstd", LOW_CARDINALITY, 128 * 1024),
+    ("zstd", LOW_CARDINALITY, 16 * 1024),
+    ("zstd", LOW_CARDINALITY, 1024 * 1024),
+]
+
+PANDAS_CONVERT = """
+import sys, time, json, pandas as pd
+start = time.perf_counter()
+pd.read_csv(sys.argv[1]).to_parquet(sys.argv[2], index=False)
+print(json.dumps({"seconds": round(time.perf_counter() - start, 2)}))
+"""
+
+
+def write_csv(path, rows, chunk_rows=500_000, seed=0):
+    rng = np.random.default_rng(seed)
+    start_date = pd.Timestamp("2020-01-01")
+    for offset in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        pd.DataFrame({
+            "id": np.arange(offset + 1, offset + n + 1),
+            "name": ["User"] * n,
+            "city": rng.choice(CITIES, n),
+            "value": rng.random(n),
+            "date": pd.date_range(start_date + pd.Timedelta(minutes=offset), periods=n, freq="min"),
+        }).to_csv(path, mode="a" if offset else "w", header=not offset, index=False)
+
+
+def run_measured(cmd, interval=0.01):
+    """Run `cmd`; returns (its JSON output, peak RSS in MB)"""
+    process = psutil.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    peak = 0
+    while process.poll() is None:
+        try:
+            peak = max(peak, process.memory_info().rss)
+        except psutil.NoSuchProcess:
+            break
+        time.sleep(interval)
+    output = process.stdout.read()
+    if process.returncode:
+        raise RuntimeError(f"{cmd} failed with exit code {process.returncode}")
+    return json.loads(output.strip().splitlines()[-1]), peak / 1e6
+
+
+def read_times(path):
+    start = time.perf_counter()
+    pq.read_table(path)
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    pq.read_table(path, columns=["value"])
+    return full, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--skip-pandas", action="store_true", help="e.g. when the CSV exceeds RAM")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    work = tempfile.mkdtemp(prefix="parquet-bench-")
+    try:
+        csv_path = os.path.join(work, "input.csv")
+        write_csv(csv_path, args.rows)
+        csv_mb = os.path.getsize(csv_path) / 1e6
+        print(f"{args.rows} rows, CSV {csv_mb:.0f} MB")
+        print(f"{'':<36}{'write s':>9}{'peak RSS':>10}{'size MB':>9}{'ratio':>7}{'read s':>8}{'1 col s':>9}")
+
+        def report(name, out_path, seconds, peak):
+            size = os.path.getsize(out_path) / 1e6
+            full, column = read_times(out_path)
+            print(f"{name:<36}{seconds:9.2f}{peak:9.0f}M{size:9.1f}{csv_mb / size:6.1f}x{full:8.2f}{column:9.2f}")
+
+        if not args.skip_pandas:
+            out_path = os.path.join(work, "pandas.parquet")
+            stats, peak = run_measured([sys.executable, "-c", PANDAS_CONVERT, csv_path, out_path])
+            report("pandas, all in memory (snappy)", out_path, stats["seconds"], peak)
+
+        for compression, dictionary, row_group_size in SETTINGS:
+            out_path = os.path.join(work, f"{compression}-{dictionary}-{row_group_size}.parquet")
+            cmd = [
+                sys.executable, os.path.join(here, "csv_to_parquet.py"), csv_path, out_path,
+                "--compression", compression, "--row-group-size", str(row_group_size),
+            ]
+            if dictionary == "none":
+                cmd.append("--no-dictionary")
+            elif dictionary != "all":
+                cmd += ["--dictionary-columns", dictionary]
+            stats, peak = run_measured(cmd)
+            name = f"{compression}, dict {dictionary}, rg {row_group_size // 1024}k"
+            report(name, out_path, stats["seconds"], peak)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
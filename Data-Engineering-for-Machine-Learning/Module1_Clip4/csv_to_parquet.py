@@ -0,0 +1,137 @@
+"""
+Stream a CSV of any size into Parquet with bounded memory.
+
+parquet_example.ipynb builds the whole DataFrame in memory before writing
+it. Here pyarrow's streaming CSV reader parses the file block by block
+(block_size bytes at a time, on several threads), and the batches are
+written out in row groups of exactly row_group_size rows. Memory holds one
+row group plus the blocks the reader parses ahead (a few dozen), so it
+depends on row_group_size and block_size, not on the size of the CSV.
+
+Dictionary encoding pays off for low-cardinality columns (categories,
+repeated strings); use_dictionary also takes a list of column names.
+
+Column types are inferred from the first block. A column that is empty
+there but filled later (or integers that later turn into floats) can be
+fixed with column_types, e.g. {"comment": pa.string()}, or on the command
+line with --column-type comment=string (repeatable).
+
+    convert("drop.csv", "drop.parquet", compression="zstd", row_group_size=256_000)
+
+or from the command line (prints the stats as JSON):
+
+    python csv_to_parquet.py drop.csv drop.parquet --compression snappy --no-dictionary
+    python csv_to_parquet.py drop.csv drop.parquet --column-type comment=string --column-type value=float64
+"""
+import argparse
+import json
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+ROW_GROUP_SIZE = 128 * 1024
+BLOCK_SIZE = 1 << 20
+
+
+def convert(csv_path, parquet_path, row_group_size=ROW_GROUP_SIZE, compression="zstd",
+            compression_level=None, use_dictionary=True, block_size=BLOCK_SIZE,
+            column_types=None):
+    """Convert `csv_path` to `parquet_path`; returns stats about the conversion"""
+    start = time.perf_counter()
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=pv.ConvertOptions(column_types=column_types or {}),
+    )
+    rows = row_groups = 0
+    pending, pending_rows = [], 0
+    tmp = parquet_path + ".tmp"
+    try:
+        with pq.ParquetWriter(
+            tmp,
+            reader.schema,
+            compression=compression,
+            compression_level=compression_level,
+            use_dictionary=use_dictionary,
+        ) as writer:
+
+            def flush(table):
+                nonlocal rows, row_groups
+                writer.write_table(table, row_group_size=row_group_size)
+                rows += table.num_rows
+                row_groups += 1
+
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                if pending_rows < row_group_size:
+                    continue
+                # Write full row groups; the remainder starts the next one
+                table = pa.Table.from_batches(pending)
+                full = pending_rows - pending_rows % row_group_size
+                for offset in range(0, full, row_group_size):
+                    flush(table.slice(offset, row_group_size))
+                rest = table.slice(full)
+                pending, pending_rows = rest.to_batches(), rest.num_rows
+            if pending_rows:
+                flush(pa.Table.from_batches(pending, schema=reader.schema))
+    except BaseException:
+        # Do not leave a half-written file behind
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, parquet_path)
+    return {
+        "rows": rows,
+        "row_groups": row_groups,
+        "csv_mb": round(os.path.getsize(csv_path) / 1e6, 1),
+        "parquet_mb": round(os.path.getsize(parquet_path) / 1e6, 1),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def parse_column_type(spec):
+    """Parse NAME=TYPE, e.g. comment=string, into (name, pyarrow type)"""
+    name, sep, type_name = spec.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected name=type, got '{spec}'")
+    try:
+        return name, pa.type_for_alias(type_name)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"unknown type '{type_name}' for column '{name}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a CSV file into Parquet")
+    parser.add_argument("csv_path")
+    parser.add_argument("parquet_path")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    parser.add_argument("--compression", default="zstd", help="zstd, snappy, gzip, none, ...")
+    parser.add_argument("--compression-level", type=int, default=None)
+    dictionary = parser.add_mutually_exclusive_group()
+    dictionary.add_argument("--no-dictionary", action="store_true")
+    dictionary.add_argument(
+        "--dictionary-columns", help="comma-separated; only these columns are dictionary-encoded"
+    )
+    parser.add_argument("--block-size-mb", type=float, default=BLOCK_SIZE / (1 << 20))
+    parser.add_argument(
+        "--column-type", type=parse_column_type, action="append", default=[],
+        metavar="NAME=TYPE", help="override an inferred type, e.g. comment=string (repeatable)",
+    )
+    args = parser.parse_args()
+    stats = convert(
+        args.csv_path,
+        args.parquet_path,
+        row_group_size=args.row_group_size,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        use_dictionary=(
+            args.dictionary_columns.split(",") if args.dictionary_columns else not args.no_dictionary
+        ),
+        block_size=int(args.block_size_mb * (1 << 20)),
+        column_types=dict(args.column_type),
+    )
+    print(json.dumps(stats))
@@ -0,0 +1,141 @@
+"""
+Ingestion throughput and peak memory: the notebook's approach (read each
+file eagerly with pandas / json.load + json_normalize, one after the
+other, then concat) against ingest() with 1..N parser processes, at two
+input sizes.
+
+The generated files mix CSV, JSON arrays and NDJSON, with schema drift
+between them (extra and missing columns, ints that become floats, nested
+objects). Every run is a separate process; peak RSS is sampled with psutil
+over the process and its children (the parser pool).
+
+    python benchmark_ingestion.py --mb 100 200 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+EAGER = """
+import glob, json, os, sys, time
+import pandas as pd
+start = time.perf_counter()
+frames = []
+for path in sorted(glob.glob(os.path.join(sys.argv[1], "**", "*.*"), recursive=True)):
+    if path.endswith(".csv"):
+        frames.append(pd.read_csv(path))
+    elif path.endswith(".ndjson"):
+        frames.append(pd.json_normalize([json.loads(line) for line in open(path)]))
+    else:
+        with open(path) as f:
+            frames.append(pd.json_normalize(json.load(f)))
+combined = pd.concat(frames, ignore_index=True)
+print(json.dumps({"rows": len(combined), "seconds": round(time.perf_counter() - start, 2)}))
+"""
+
+
+def make_record(rng, i, drift):
+    record = {
+        "id": i,
+        "sensor": f"s-{rng.randint(1, 50)}",
+        "reading": rng.random() * 100 if drift else rng.randint(0, 100),
+        "location": {"lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)},
+    }
+    if drift:
+        record["status"] = rng.choice(["ok", "warn", "fail"])
+    return record
+
+
+def write_files(root, size_mb, files=24, seed=0):
+    rng = random.Random(seed)
+    per_file = size_mb * 1e6 / files
+    i = 0
+    for n in range(files):
+        kind = ("csv", "json", "ndjson")[n % 3]
+        path = os.path.join(root, f"part{n // 6}", f"source-{n}.{kind}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        drift = n % 2 == 1
+        with open(path, "w", encoding="utf-8") as f:
+            if kind == "csv":
+                f.write("id,sensor,reading,battery\n")
+            elif kind == "json":
+                f.write("[\n")
+            first = True
+            while f.tell() < per_file:
+                i += 1
+                record = make_record(rng, i, drift)
+                if kind == "csv":
+                    f.write(f"{i},{record['sensor']},{record['reading']},{rng.randint(0, 100)}\n")
+                elif kind == "json":
+                    f.write(("" if first else ",\n") + json.dumps(record))
+                else:
+                    f.write(json.dumps(record) + "\n")
+                first = False
+            if kind == "json":
+                f.write("\n]\n")
+
+
+def run_measured(cmd, interval=0.01):
+    """Run `cmd`; returns (its JSON output, peak RSS of it and its children in MB)"""
+    process = psutil.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    peak = 0
+    while process.poll() is None:
+        try:
+            tree = [process] + process.children(recursive=True)
+            rss = 0
+            for p in tree:
+                try:
+                    rss += p.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            peak = max(peak, rss)
+        except psutil.NoSuchProcess:
+            break
+        time.sleep(interval)
+    output = process.stdout.read()
+    if process.returncode:
+        raise RuntimeError(f"{cmd} failed with exit code {process.returncode}")
+    return json.loads(output.strip().splitlines()[-1]), peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, nargs="+", default=[50, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'':<30}{'rows':>10}{'seconds':>9}{'MB/s':>8}{'peak RSS':>10}")
+    for size_mb in args.mb:
+        work = tempfile.mkdtemp(prefix="ingest-bench-")
+        try:
+            data = os.path.join(work, "data")
+            write_files(data, size_mb)
+            print(f"-- {size_mb} MB in 24 files (CSV, JSON, NDJSON)")
+
+            stats, peak = run_measured([sys.executable, "-c", EAGER, data])
+            rate = size_mb / stats["seconds"]
+            print(f"{'eager, one after another':<30}{stats['rows']:>10}{stats['seconds']:9.2f}{rate:8.1f}{peak:9.0f}M")
+
+            for workers in args.workers:
+                out = os.path.join(work, "combined.arrow")
+                stats, peak = run_measured([
+                    sys.executable, os.path.join(here, "ingestion.py"), out, data,
+                    "--workers", str(workers),
+                ])
+                name = f"ingest, {workers} parser process{'es' if workers > 1 else ''}"
+                print(f"{name:<30}{stats['rows']:>10}{stats['seconds']:9.2f}{stats['mb_per_second']:8.1f}{peak:9.0f}M")
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
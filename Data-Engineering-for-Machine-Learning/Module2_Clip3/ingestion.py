@@ -0,0 +1,368 @@
+"""
+Parallel ingestion of many CSV / JSON / NDJSON files (and JSON APIs) into
+one Arrow table.
+
+multiple_files.ipynb reads each source eagerly, one after the other. Here:
+
+- sources can be files, directories (searched recursively for PATTERNS) or
+  http(s) URLs; a thread pool downloads the URLs to a staging directory;
+- a process pool parses the files in parallel. CSV goes through pyarrow's
+  streaming reader, NDJSON through pyarrow's JSON reader one block at a
+  time, and JSON arrays are decoded incrementally, one record at a time.
+  Nested objects are flattened like pd.json_normalize ("a.b" columns).
+  Each worker writes Arrow record batches of at most batch_rows rows to
+  staged part files, so no process holds a whole input in memory;
+- the part schemas are reconciled: missing columns become nulls, int and
+  float become float, null-only columns take the other files' type, and
+  columns whose types conflict otherwise become strings;
+- all parts are streamed into a single Arrow IPC file with that schema.
+  open_table() memory-maps it, so the table is not copied into RAM.
+
+    stats = ingest(["data/", "energy_efficiency.csv"], "combined.arrow")
+    table = open_table("combined.arrow")
+
+    python ingestion.py combined.arrow data/ energy_efficiency.csv --workers 4
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.json as pj
+import requests
+
+PATTERNS = ("*.csv", "*.json", "*.ndjson", "*.jsonl")
+BATCH_ROWS = 10_000
+CHUNK_SIZE = 1 << 20
+
+_SEPARATORS = re.compile(r"[\s,]*")
+_WHITESPACE = re.compile(r"\s*")
+
+
+def discover(root, patterns=PATTERNS):
+    """Files under `root` matching any of `patterns`, sorted"""
+    found = set()
+    for pattern in patterns:
+        found.update(glob.glob(os.path.join(root, "**", pattern), recursive=True))
+    return sorted(found)
+
+
+# Parsing (runs in the worker processes)
+
+def iter_json_records(path, record_path=None, chunk_size=CHUNK_SIZE):
+    """
+    Records of a JSON file, decoded incrementally: a top-level array of
+    records, NDJSON / concatenated JSON values, or a single object. With
+    `record_path`, an object's records are taken from that key (a list of
+    records, or a dict of columns like an API's "hourly" block).
+
+    Only arrays and NDJSON are streamed record by record; a single top-level
+    object is held in memory whole. While a value is incomplete, the read
+    size doubles, so decoding a large value costs O(size), not O(size^2).
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, eof = f.read(chunk_size), False
+        read_size = chunk_size
+        pos = _WHITESPACE.match(buf).end()
+        in_array = buf[pos:pos + 1] == "["
+        if in_array:
+            pos += 1
+        skip = _SEPARATORS if in_array else _WHITESPACE
+        while True:
+            pos = skip.match(buf, pos).end()
+            if pos == len(buf) and not eof:
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+                continue
+            if pos == len(buf) or (in_array and buf[pos] == "]"):
+                return
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if end == len(buf) and not eof:
+                    raise json.JSONDecodeError("value may continue", buf, end)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(read_size)
+                read_size *= 2
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            read_size = chunk_size
+            pos = end
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
+            yield from _records(value, record_path)
+
+
+def _records(value, record_path):
+    if record_path and isinstance(value, dict) and record_path in value:
+        value = value[record_path]
+        if isinstance(value, dict):  # columns -> rows
+            names = list(value)
+            yield from (dict(zip(names, row)) for row in zip(*value.values()))
+            return
+    if isinstance(value, list):
+        yield from value
+    else:
+        yield value
+
+
+def _flatten(record, prefix="", out=None):
+    """Nested objects become "parent.child" keys, as in pd.json_normalize"""
+    out = {} if out is None else out
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            _flatten(value, f"{prefix}{key}.", out)
+        else:
+            out[f"{prefix}{key}"] = value
+    return out
+
+
+def _to_json_strings(values):
+    return pa.array(
+        [None if v is None else v if isinstance(v, str) else json.dumps(v) for v in values],
+        pa.string(),
+    )
+
+
+def _records_to_batch(records):
+    rows = [_flatten(r) if isinstance(r, dict) else {"value": r} for r in records]
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        try:
+            columns.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            columns.append(_to_json_strings(values))  # mixed types within the batch
+    return pa.RecordBatch.from_arrays(columns, names=names)
+
+
+def _flatten_structs(table):
+    while any(pa.types.is_struct(field.type) for field in table.schema):
+        table = table.flatten()
+    return table
+
+
+def _iter_ndjson_batches(path, batch_rows):
+    """
+    NDJSON in newline-aligned blocks, decoded by pyarrow's C++ JSON reader.
+    A block it rejects (e.g. a field that is a number in one line and a
+    string in another) is decoded record by record instead.
+    """
+    with open(path, "rb") as f:
+        rest = b""
+        while True:
+            block = f.read(CHUNK_SIZE)
+            data = rest + block
+            cut = data.rfind(b"\n") + 1 if block else len(data)
+            data, rest = data[:cut], data[cut:]
+            if data.strip():
+                try:
+                    table = pj.read_json(pa.BufferReader(data), pj.ReadOptions(use_threads=False))
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    lines = data.decode("utf-8").splitlines()
+                    records = [json.loads(line) for line in lines if line.strip()]
+                    table = pa.Table.from_batches([_records_to_batch(records)])
+                yield from _flatten_structs(table).to_batches(max_chunksize=batch_rows)
+            if not block:
+                return
+
+
+def _iter_batches(path, batch_rows, record_path):
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        yield from pv.open_csv(path, read_options=pv.ReadOptions(block_size=CHUNK_SIZE))
+        return
+    if lower.endswith((".ndjson", ".jsonl")) and not record_path:
+        yield from _iter_ndjson_batches(path, batch_rows)
+        return
+    records = []
+    for record in iter_json_records(path, record_path):
+        records.append(record)
+        if len(records) >= batch_rows:
+            yield _records_to_batch(records)
+            records = []
+    if records:
+        yield _records_to_batch(records)
+
+
+def _parse(path, part_prefix, batch_rows, record_path):
+    """Write `path` as Arrow part files; one part per run of batches sharing a schema"""
+    parts = []
+    writer = sink = schema = None
+    try:
+        for batch in _iter_batches(path, batch_rows, record_path):
+            if batch.schema != schema:
+                if writer is not None:
+                    writer.close()
+                    sink.close()
+                part_path = f"{part_prefix}-{len(parts)}.arrow"
+                sink = pa.OSFile(part_path, "wb")
+                schema = batch.schema
+                writer = pa.ipc.new_stream(sink, schema)
+                parts.append([part_path, batch.schema, 0])
+            writer.write_batch(batch)
+            parts[-1][2] += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+            sink.close()
+    return path, [tuple(part) for part in parts], os.path.getsize(path)
+
+
+# Reconciliation and output
+
+def reconcile(schemas):
+    """One schema covering every field of `schemas`, in first-seen order"""
+    types = {}
+    for schema in schemas:
+        for field in schema:
+            types.setdefault(field.name, []).append(field.type)
+    fields, conflicts = [], []
+    for name, field_types in types.items():
+        try:
+            merged = pa.unify_schemas(
+                [pa.schema([(name, t)]) for t in field_types], promote_options="permissive"
+            ).field(name)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            merged = pa.field(name, pa.string())
+            conflicts.append(name)
+        fields.append(merged.with_nullable(True))
+    return pa.schema(fields), conflicts
+
+
+def _align(batch, schema):
+    columns = []
+    for field in schema:
+        if field.name not in batch.schema.names:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+            continue
+        column = batch.column(field.name)
+        if column.type != field.type:
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                column = _to_json_strings(column.to_pylist())
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _fetch(url, staging_dir, index, timeout=30):
+    """Download `url` to the staging directory, streamed to disk"""
+    path = os.path.join(staging_dir, f"download-{index}.json")
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+    return path
+
+
+def _expand(sources):
+    """(files, urls) named by `sources`, each once, in first-seen order"""
+    files, urls = [], []
+    for source in sources:
+        if source.startswith(("http://", "https://")):
+            urls.append(source)
+        elif os.path.isdir(source):
+            files.extend(discover(source))
+        else:
+            files.append(source)
+    # A file listed on its own and found in a directory again is parsed once
+    files = [os.path.normpath(path) for path in files]
+    return list(dict.fromkeys(files)), list(dict.fromkeys(urls))
+
+
+def ingest(sources, output_path, workers=None, io_workers=8, batch_rows=BATCH_ROWS,
+           record_path=None, source_column="_source"):
+    """Ingest every source into one Arrow IPC file at `output_path`; returns stats"""
+    start = time.perf_counter()
+    files, urls = _expand(sources)
+    staging_dir = tempfile.mkdtemp(prefix="ingest-", dir=os.path.dirname(os.path.abspath(output_path)))
+    results = {}  # source -> (parts, bytes)
+    try:
+        with ThreadPoolExecutor(io_workers) as io_pool, ProcessPoolExecutor(workers) as parse_pool:
+            parsing = {}
+
+            def parse(path, source):
+                prefix = os.path.join(staging_dir, f"part-{len(parsing)}")
+                parsing[parse_pool.submit(_parse, path, prefix, batch_rows, record_path)] = source
+
+            downloads = {io_pool.submit(_fetch, url, staging_dir, i): url for i, url in enumerate(urls)}
+            for path in files:
+                parse(path, path)
+            # Downloads are parsed as soon as each one lands
+            for future in as_completed(downloads):
+                parse(future.result(), downloads[future])
+            for future in as_completed(parsing):
+                _, parts, size = future.result()
+                results[parsing[future]] = (parts, size)
+
+        ordered = [source for source in files + urls if source in results]
+        schema, conflicts = reconcile(
+            [part_schema for source in ordered for _, part_schema, _ in results[source][0]]
+        )
+        if source_column:
+            schema = schema.append(pa.field(source_column, pa.string()))
+
+        rows = 0
+        tmp = output_path + ".tmp"
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for source in ordered:
+                for part_path, _, _ in results[source][0]:
+                    with pa.memory_map(part_path) as part:
+                        for batch in pa.ipc.open_stream(part):
+                            if source_column:
+                                batch = batch.append_column(
+                                    source_column, pa.array([source] * batch.num_rows, pa.string())
+                                )
+                            writer.write_batch(_align(batch, schema))
+                            rows += batch.num_rows
+                    os.remove(part_path)
+        os.replace(tmp, output_path)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    seconds = time.perf_counter() - start
+    input_mb = sum(size for _, size in results.values()) / 1e6
+    return {
+        "sources": len(results),
+        "rows": rows,
+        "columns": len(schema),
+        "conflicting_columns": conflicts,
+        "input_mb": round(input_mb, 1),
+        "output_mb": round(os.path.getsize(output_path) / 1e6, 1),
+        "seconds": round(seconds, 2),
+        "mb_per_second": round(input_mb / seconds, 1),
+    }
+
+
+def open_table(path):
+    """The ingested table, memory-mapped from its Arrow file"""
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest files, directories and URLs into one Arrow file")
+    parser.add_argument("output_path")
+    parser.add_argument("sources", nargs="+")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPUs)")
+    parser.add_argument("--io-workers", type=int, default=8)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--record-path", default=None, help='e.g. "hourly" for the weather API')
+    args = parser.parse_args()
+    stats = ingest(
+        args.sources, args.output_path, workers=args.workers, io_workers=args.io_workers,
+        batch_rows=args.batch_rows, record_path=args.record_path,
+    )
+    print(json.dumps(stats))
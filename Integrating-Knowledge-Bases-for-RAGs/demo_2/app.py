@@ -1,8 +1,18 @@
 # Step 1 - Import Necessary Libraries
 
-import wikipediaapi
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from flask import Flask, render_template, request
+import json
+import os
+import threading
+import time
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+
+from domain_store import open_domain_store
+from model_loader import ModelLoader, ModelUnavailable
+from rag_cache import SourceCache, SummaryCache, make_fetcher
+from rag_workers import BatchingGenerator, LatencyStats, fan_out
 
 # Step 2 - Initialize the Flask Application
 
@@ -10,10 +20,8 @@ app = Flask(__name__)
 
 # Step 3 - Initialize Wikipedia API
 
-# Initialize Wikipedia API with correct argument names
-wiki_wiki = wikipediaapi.Wikipedia(
-    language="en", user_agent="RAGDemo/1.0 (bletort@bellsouth.net)"
-)
+# Wikipedia (or RAG_FETCHER=local) behind an on-disk cache with a TTL
+source_cache = SourceCache(make_fetcher())
 
 # Step 4 - Simulating a Domain-Specific Database
 
@@ -24,28 +32,147 @@ domain_specific_data = {
     "Trajan": "Imperator of Rome. Has big nose. Born in Spain",
 }
 
+# Indexed store: the dict above, or a JSON / SQLite file via RAG_DOMAIN_STORE
+domain_store = open_domain_store(
+    os.environ.get("RAG_DOMAIN_STORE"), default=domain_specific_data
+)
+DOMAIN_TOP_K = int(os.environ.get("RAG_DOMAIN_TOP_K", 3))
+
 # Step 5 - Load a Pre-Trained NLP Model and Tokenizer
 
-# Load pre-trained model and tokenizer
-model_name = "facebook/bart-large-cnn"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+# Load pre-trained model and tokenizer (in the background by default, see
+# model_loader.py; /ready reports when it is in)
+model_name = os.environ.get("RAG_MODEL", "facebook/bart-large-cnn")
+loader = ModelLoader(
+    model_name,
+    variant=os.environ.get("RAG_MODEL_VARIANT", "fp32"),
+    mode=os.environ.get("RAG_MODEL_LOAD", "background"),
+)
+# Cached summaries depend on the variant too (int8 outputs can differ)
+model_key = f"{model_name}:{loader.variant}"
+# Seconds a request waits for a model that is still loading before it gets a 503
+MODEL_WAIT = float(os.environ.get("RAG_MODEL_WAIT", 10))
+
+GENERATION_PARAMS = {"max_length": 150, "num_beams": 5, "early_stopping": True}
+MAX_INPUT_TOKENS = 1024
+
+# Summaries keyed by model, combined context and generation parameters
+summary_cache = SummaryCache()
+
+
+def summarize_batch(contexts):
+    """One padded beam search over several contexts"""
+    tokenizer, model = loader.get(timeout=MODEL_WAIT)
+    inputs = tokenizer(
+        contexts,
+        return_tensors="pt",
+        max_length=MAX_INPUT_TOKENS,
+        truncation=True,
+        padding=True,
+    )
+    outputs = model.generate(
+        inputs["input_ids"], attention_mask=inputs["attention_mask"], **GENERATION_PARAMS
+    )
+    return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+# Dedicated generation thread; concurrent requests are batched together
+generator = BatchingGenerator(
+    summarize_batch,
+    max_batch_size=int(os.environ.get("RAG_MAX_BATCH", 8)),
+    max_wait=float(os.environ.get("RAG_BATCH_WAIT", 0.02)),
+)
+
+# Streaming uses greedy decoding (or sampling with ?sample=1): beam search
+# only knows its best sequence at the end, so it has nothing to stream
+STREAM_PARAMS = {"max_length": 150, "num_beams": 1, "do_sample": False}
+SAMPLE_PARAMS = {"max_length": 150, "num_beams": 1, "do_sample": True, "top_p": 0.9}
+stream_slots = threading.BoundedSemaphore(int(os.environ.get("RAG_MAX_STREAMS", 2)))
+# Seconds a stream waits for a free slot before it gets an "error" event
+STREAM_SLOT_TIMEOUT = float(os.environ.get("RAG_STREAM_SLOT_TIMEOUT", 30))
+ttft_stats = LatencyStats()
+
+
+class StopOnEvent(StoppingCriteria):
+    """Ends generate at the next token once `event` is set"""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full(
+            (input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device
+        )
+
+
+def stream_summary(combined_data, params):
+    """
+    Yield decoded text pieces while generate runs on its own thread. Closing
+    the generator early (client went away) stops generate and waits for it.
+    """
+    tokenizer, model = loader.get(timeout=MODEL_WAIT)
+    inputs = tokenizer(
+        combined_data, return_tensors="pt", max_length=MAX_INPUT_TOKENS, truncation=True
+    )
+    streamer = TextIteratorStreamer(
+        tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=120
+    )
+    errors = []
+    stop = threading.Event()
+
+    def run():
+        try:
+            model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                streamer=streamer,
+                stopping_criteria=StoppingCriteriaList([StopOnEvent(stop)]),
+                **params,
+            )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="stream", daemon=True)
+    thread.start()
+    try:
+        for text in streamer:
+            if text:
+                yield text
+    finally:
+        stop.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+# Per-source retrieval timeouts in seconds
+SOURCE_TIMEOUTS = {
+    "domain": 1.0,
+    "wikipedia": float(os.environ.get("RAG_WIKI_TIMEOUT", 5.0)),
+}
+
 
 # Step 6 - defining the RAG System Function
 
 
-def rag_system(query):
-    # Step 1: Retrieve domain-specific data
-    domain_data = None
-    for key in domain_specific_data:
-        if key.lower() in query.lower():
-            print(f"Pair '{key}': {domain_specific_data[key]}")
-            domain_data = domain_specific_data[key]
-            break
-
-    # Step 2: Fetch data from Wikipedia
-    wiki_page = wiki_wiki.page(query)
-    wiki_summary = wiki_page.summary if wiki_page.exists() else None
+def lookup_domain_data(query):
+    """Text of every key phrase found in the query, most specific first"""
+    matches = domain_store.lookup(query, k=DOMAIN_TOP_K)
+    for key, text, _ in matches:
+        print(f"Pair '{key}': {text}")
+    return " ".join(text for _, text, _ in matches) or None
+
+
+def retrieve_context(query):
+    # Step 1 & 2: Retrieve domain-specific data and Wikipedia concurrently
+    retrieved = fan_out(
+        {"domain": lookup_domain_data, "wikipedia": source_cache.fetch},
+        query,
+        timeouts=SOURCE_TIMEOUTS,
+    )
+    domain_data = retrieved["domain"]
+    wiki_summary = retrieved["wikipedia"]
 
     # Step 3: Combine and process data
     combined_data = ""
@@ -58,14 +185,19 @@ def rag_system(query):
         print(f"Wikipedia summary '{query}': {wiki_summary[:20]}...")
         combined_data += wiki_summary
 
+    return combined_data
+
+
+def rag_system(query):
+    combined_data = retrieve_context(query)
+
     if combined_data:
-        inputs = tokenizer(
-            combined_data, return_tensors="pt", max_length=1024, truncation=True
+        response = summary_cache.get_or_generate(
+            model_key,
+            combined_data,
+            {**GENERATION_PARAMS, "max_input_tokens": MAX_INPUT_TOKENS},
+            generator.generate,
         )
-        outputs = model.generate(
-            inputs["input_ids"], max_length=150, num_beams=5, early_stopping=True
-        )
-        response = tokenizer.decode(outputs[0], skip_special_tokens=True)
     else:
         response = "No relevant data found."
 
@@ -79,10 +211,115 @@ def rag_system(query):
 def index():
     if request.method == "POST":
         query = request.form["query"]
-        response = rag_system(query)
+        try:
+            response = rag_system(query)
+        except ModelUnavailable as e:
+            return render_template("index.html", query=query, response=str(e)), 503
         return render_template("index.html", query=query, response=response)
     return render_template("index.html", query=None, response=None)
 
 
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route("/stream")
+def stream():
+    """
+    Server-sent events for ?query=...: "token" events with decoded text as it
+    is generated, then "done" with time to first token and total time.
+    Failures, including a model that is still loading, come as an "error"
+    event: EventSource cannot read the body of a non-200 response.
+    """
+    query = request.args.get("query", "")
+    sample = request.args.get("sample") == "1"
+    params = SAMPLE_PARAMS if sample else STREAM_PARAMS
+    started = time.perf_counter()
+
+    def generate():
+        combined_data = retrieve_context(query)
+        if not combined_data:
+            yield sse("token", {"text": "No relevant data found."})
+            yield sse("done", {"cached": False})
+            return
+
+        cache_params = {**params, "max_input_tokens": MAX_INPUT_TOKENS}
+        # Sampled outputs are not reproducible, so only greedy ones are cached
+        cached = None if sample else summary_cache.get(model_key, combined_data, cache_params)
+        if cached is not None:
+            ttft = time.perf_counter() - started
+            ttft_stats.add(ttft)
+            yield sse("token", {"text": cached})
+            yield sse("done", {"cached": True, "ttft": round(ttft, 4), "total": round(ttft, 4)})
+            return
+
+        if not stream_slots.acquire(timeout=STREAM_SLOT_TIMEOUT):
+            yield sse("error", {"error": "Too many concurrent streams, try again later"})
+            return
+
+        # The slot is held until generate has stopped, also when the client
+        # disconnects mid-stream (closing this generator closes `pieces_iter`)
+        pieces, ttft = [], None
+        pieces_iter = stream_summary(combined_data, params)
+        try:
+            for text in pieces_iter:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    ttft_stats.add(ttft)
+                pieces.append(text)
+                yield sse("token", {"text": text})
+        except Exception as e:
+            print(f"Streaming error for '{query}': {e}")  # Debug logging
+            yield sse("error", {"error": str(e)})
+            return
+        finally:
+            pieces_iter.close()
+            stream_slots.release()
+
+        if pieces and not sample:
+            summary_cache.put(model_key, combined_data, cache_params, "".join(pieces))
+        total = time.perf_counter() - started
+        yield sse(
+            "done",
+            {"cached": False, "ttft": round(ttft or total, 4), "total": round(total, 4)},
+        )
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/healthz")
+def healthz():
+    """Liveness: the process is up, whether or not the model is loaded"""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/ready")
+def ready():
+    """
+    Readiness: 200 once the model is loaded, 503 before that. In lazy mode
+    the first probe starts the load.
+    """
+    loader.start()
+    return jsonify(loader.status()), 200 if loader.ready else 503
+
+
+@app.route("/stats")
+def stats():
+    """Hit rates of the source and summary caches, generation batching"""
+    return jsonify(
+        {
+            "sources": source_cache.cache.stats(),
+            "summaries": summary_cache.cache.stats(),
+            "generation": generator.stats(),
+            "time_to_first_token": ttft_stats.summary(),
+            "model": loader.status(),
+        }
+    )
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Threaded server: requests wait on the generation worker, not on each other
+    app.run(debug=True, threaded=True)
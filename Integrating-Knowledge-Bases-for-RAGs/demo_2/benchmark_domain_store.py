@@ -0,0 +1,92 @@
+"""
+Domain lookup latency as the number of entries grows: the previous
+substring scan over a dict against the indexed DomainStore (in memory and
+SQLite backed).
+
+    python benchmark_domain_store.py
+"""
+import os
+import random
+import tempfile
+import time
+
+from domain_store import DictDomainStore, SQLiteDomainStore, build_sqlite
+
+WORDS = """cloud storage network edge cluster data center rack cooling power grid
+neural model training inference ethics policy privacy audit security roman
+empire senate legion province trade route harbour""".split()
+
+
+# lookup_domain_data in app.py before e1220c8
+def substring_lookup(query, data):
+    for key in data:
+        if key.lower() in query.lower():
+            return data[key]
+    return None
+
+
+# The demo data's keys (app.py), with queries the substring scan answered
+DEMO_KEYS = {"data center": "DC", "AI ethics": "AE", "Trajan": "T"}
+DEMO_QUERIES = [
+    "Tell me about data centers",
+    "What is a data center?",
+    "AI ethics and Trajan",
+    "Who was Trajan",
+    "Nothing to see here",
+]
+
+
+def check_demo_queries():
+    """The substring scan's answer is among the indexed store's matches"""
+    store = DictDomainStore(DEMO_KEYS)
+    for query in DEMO_QUERIES:
+        expected = substring_lookup(query, DEMO_KEYS)
+        found = [text for _, text, _ in store.lookup(query)]
+        if (expected is None) != (not found) or (expected is not None and expected not in found):
+            return f"DIFFERENT for {query!r}: {expected!r} vs {found!r}"
+    return "same as substring scan"
+
+
+def synthetic_data(n, rng):
+    data = {}
+    while len(data) < n:
+        phrase = " ".join(rng.sample(WORDS, rng.randint(1, 3))) + f" {len(data)}"
+        data[phrase] = f"Snippet about {phrase}."
+    return data
+
+
+def per_query_ms(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def main():
+    rng = random.Random(42)
+    print(f"Demo queries: {check_demo_queries()}")
+    print(f"{'entries':>9}{'substring':>12}{'index':>10}{'sqlite':>10}{'matches':>9}")
+    for n in (1_000, 10_000, 100_000):
+        data = synthetic_data(n, rng)
+        keys = list(data)
+        # Queries mention a random key; half of them a word that matches nothing
+        queries = [f"Tell me about {rng.choice(keys)} please" for _ in range(200)]
+        queries += [f"What is {rng.choice(WORDS)}lessness?" for _ in range(200)]
+
+        store = DictDomainStore(data)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "domain.db")
+            build_sqlite(data, path)
+            sqlite_store = SQLiteDomainStore(path)
+
+            scan = per_query_ms(lambda q: substring_lookup(q, data), queries[:50] + queries[-50:])
+            indexed = per_query_ms(store.lookup, queries)
+            sqlite = per_query_ms(sqlite_store.lookup, queries)
+            matches = sum(len(store.lookup(q)) for q in queries) / len(queries)
+            sqlite_store._conn.close()
+
+        print(f"{n:>9,}{scan:>10.3f}ms{indexed:>8.3f}ms{sqlite:>8.3f}ms{matches:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
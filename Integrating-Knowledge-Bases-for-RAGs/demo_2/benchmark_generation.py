@@ -0,0 +1,107 @@
+"""
+Generation throughput with concurrent clients: one beam search per request
+(the previous behaviour) against BatchingGenerator.
+
+By default the model is a small randomly initialised BART, so this runs
+offline; pass --model facebook/bart-large-cnn for the real one.
+
+    python benchmark_generation.py --clients 1 4 8
+"""
+import argparse
+import random
+import threading
+import time
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, BartConfig, BartForConditionalGeneration
+
+from rag_workers import BatchingGenerator
+
+GENERATION_PARAMS = {"max_length": 60, "min_length": 60, "num_beams": 5, "early_stopping": True}
+
+
+def load_model(name):
+    if name:
+        return AutoModelForSeq2SeqLM.from_pretrained(name).eval()
+    config = BartConfig(
+        vocab_size=8000,
+        d_model=256,
+        encoder_layers=3,
+        decoder_layers=3,
+        encoder_attention_heads=4,
+        decoder_attention_heads=4,
+        encoder_ffn_dim=1024,
+        decoder_ffn_dim=1024,
+        max_position_embeddings=1024,
+    )
+    torch.manual_seed(0)
+    return BartForConditionalGeneration(config).eval()
+
+
+def make_generate_batch(model):
+    pad = model.config.pad_token_id
+
+    def generate_batch(contexts):
+        """contexts are token id lists; right-padded into one tensor"""
+        width = max(len(ids) for ids in contexts)
+        input_ids = torch.full((len(contexts), width), pad, dtype=torch.long)
+        attention_mask = torch.zeros_like(input_ids)
+        for row, ids in enumerate(contexts):
+            input_ids[row, : len(ids)] = torch.tensor(ids)
+            attention_mask[row, : len(ids)] = 1
+        with torch.inference_mode():
+            outputs = model.generate(
+                input_ids, attention_mask=attention_mask, **GENERATION_PARAMS
+            )
+        return outputs.tolist()
+
+    return generate_batch
+
+
+def run_clients(n_clients, requests_per_client, contexts, generate):
+    def client(i):
+        for j in range(requests_per_client):
+            generate(contexts[(i * requests_per_client + j) % len(contexts)])
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return n_clients * requests_per_client / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=4, help="per client")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    generate_batch = make_generate_batch(model)
+    rng = random.Random(0)
+    vocab = model.config.vocab_size
+    contexts = [[rng.randrange(4, vocab) for _ in range(rng.randint(200, 400))] for _ in range(64)]
+    generate_batch(contexts[:1])  # warm up
+
+    # Previous behaviour: each request runs its own generate call, one at a time
+    lock = threading.Lock()
+
+    def sequential(context):
+        with lock:
+            return generate_batch([context])[0]
+
+    batcher = BatchingGenerator(generate_batch, max_batch_size=8)
+
+    print(f"{'clients':>8}{'sequential':>14}{'batched':>14}{'speedup':>9}")
+    for n in args.clients:
+        seq = run_clients(n, args.requests, contexts, sequential)
+        bat = run_clients(n, args.requests, contexts, batcher.generate)
+        print(f"{n:>8}{seq:>10.2f} r/s{bat:>10.2f} r/s{bat / seq:>8.1f}x")
+    print("batcher:", batcher.stats())
+
+
+if __name__ == "__main__":
+    main()
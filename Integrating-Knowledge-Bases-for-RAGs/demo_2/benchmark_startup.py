@@ -0,0 +1,162 @@
+"""
+Startup time and per-request latency of the model_loader variants, each
+measured in a fresh process (twice, so the second run shows the on-disk
+caches for int8 and compiled).
+
+By default a randomly initialised BART with bart-base dimensions and a
+small word-level tokenizer is written to model_cache/bench-bart, so this
+runs offline; pass --model facebook/bart-large-cnn for the real one.
+
+    python benchmark_startup.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import torch
+
+import model_loader
+
+BENCH_MODEL = os.path.join(model_loader.MODEL_CACHE, "bench-bart")
+CONTEXT = (
+    "A data center is a facility used to house computer systems and associated "
+    "components, such as telecommunications and storage systems. "
+) * 8
+GENERATION_PARAMS = {"max_length": 60, "min_length": 60, "num_beams": 2}
+
+
+def build_bench_model(path):
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    words = sorted(set(CONTEXT.lower().replace(",", " ").replace(".", " ").split()))
+    vocab = {"<pad>": 0, "<s>": 1, "</s>": 2, "<unk>": 3}
+    vocab.update({w: i + 4 for i, w in enumerate(words)})
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend,
+        pad_token="<pad>",
+        bos_token="<s>",
+        eos_token="</s>",
+        unk_token="<unk>",
+    )
+
+    # bart-base sized (~100M parameters without the large vocabulary)
+    config = BartConfig(
+        vocab_size=len(vocab),
+        d_model=768,
+        encoder_layers=6,
+        decoder_layers=6,
+        encoder_attention_heads=12,
+        decoder_attention_heads=12,
+        encoder_ffn_dim=3072,
+        decoder_ffn_dim=3072,
+        max_position_embeddings=1024,
+        pad_token_id=0,
+        bos_token_id=1,
+        eos_token_id=2,
+        decoder_start_token_id=2,
+    )
+    model = BartForConditionalGeneration(config)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+    # The same weights as a pickled pytorch_model.bin (newer transformers
+    # only write safetensors)
+    bin_path = path + "-bin"
+    os.makedirs(bin_path, exist_ok=True)
+    torch.save(model.state_dict(), os.path.join(bin_path, "pytorch_model.bin"))
+    config.save_pretrained(bin_path)
+    tokenizer.save_pretrained(bin_path)
+
+
+def child(model_name, variant, requests):
+    """Runs in a fresh process: load, then time requests; prints JSON."""
+    start = time.perf_counter()
+    tokenizer, model = model_loader.load_model(model_name, variant)
+    loaded = time.perf_counter()
+    ready_at = time.time()
+
+    inputs = tokenizer(CONTEXT, return_tensors="pt", truncation=True, max_length=1024)
+    latencies = []
+    with torch.inference_mode():
+        for _ in range(requests + 1):
+            t = time.perf_counter()
+            model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                **GENERATION_PARAMS,
+            )
+            latencies.append(time.perf_counter() - t)
+
+    steady = sorted(latencies[1:])
+    print(
+        json.dumps(
+            {
+                "ready_at": ready_at,
+                "load": loaded - start,
+                "first": latencies[0],
+                "request": steady[len(steady) // 2],
+            }
+        )
+    )
+
+
+def run_child(model_name, variant, requests):
+    """Child results plus `ready`: process spawn (imports included) to model loaded."""
+    spawned = time.time()
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", variant, "--model", model_name,
+         "--requests", str(requests)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["ready"] = result.pop("ready_at") - spawned
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--variants", nargs="+", default=list(model_loader.VARIANTS))
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.model, args.child, args.requests)
+        return
+
+    runs = []
+    if args.model:
+        runs = [(args.model, variant) for variant in args.variants]
+    else:
+        # Same random weights, once as pickled .bin and once as safetensors
+        if not os.path.exists(BENCH_MODEL + "-bin"):
+            build_bench_model(BENCH_MODEL)
+        runs = [(BENCH_MODEL + "-bin", "fp32")] + [(BENCH_MODEL, v) for v in args.variants]
+
+    print(
+        f"{'checkpoint':<14}{'variant':<10}{'run':>4}{'ready':>9}{'load':>9}"
+        f"{'1st req':>9}{'req p50':>9}"
+    )
+    for model_name, variant in runs:
+        checkpoint = "bin" if model_name.endswith("-bin") else "safetensors"
+        if args.model:
+            checkpoint = "hub"
+        for run in (1, 2):
+            r = run_child(model_name, variant, args.requests)
+            print(
+                f"{checkpoint:<14}{variant:<10}{run:>4}{r['ready']:>8.2f}s{r['load']:>8.2f}s"
+                f"{r['first']:>8.2f}s{r['request']:>8.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Domain-specific snippets for demo_2, with indexed key-phrase lookup.
+
+Entries are (key phrase, text) pairs from one of:
+
+- a dict (the built-in demo data),
+- a JSON file of {key: text},
+- a SQLite database with a table domain_data(key TEXT PRIMARY KEY, text TEXT).
+  Only the keys are held in memory; texts are read for the matched keys.
+
+RAG_DOMAIN_STORE picks the source by extension (.json, or .db/.sqlite).
+Convert a JSON file with `python domain_store.py data.json domain.db`.
+
+Key phrases are tokenised into a trie, one level per word. lookup() walks
+the query once, following the trie from every word, so its cost depends on
+the length of the query and of the longest key, not on how many entries
+there are. Unlike the old substring test, keys match on word boundaries
+("data center" no longer matches inside "metadata centers"). Words are
+reduced to a crude singular on both sides, so "data centers" still finds
+"data center", as the substring test did.
+
+Matches are ranked by the number of key words (longer phrases are more
+specific), then by how early they occur in the query. A match that lies
+inside a longer one already taken is dropped ("center" within "data
+center"), so it does not use up one of the k results.
+"""
+import abc
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def singular(word):
+    """Strip a plural ending: "centers" -> "center", "boxes" -> "box", "policies" -> "policy"."""
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [singular(word) for word in TOKEN_RE.findall(text.lower())]
+
+
+class PhraseIndex:
+    """Word-level trie of key phrases."""
+
+    END = object()
+
+    def __init__(self):
+        self.root = {}
+        self.longest = 0
+
+    def add(self, key):
+        words = tokenize(key)
+        if not words:
+            return
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(self.END, []).append(key)
+        self.longest = max(self.longest, len(words))
+
+    def find(self, text):
+        """[(key, start word, word count)] for every key phrase in `text`"""
+        words = tokenize(text)
+        matches = []
+        for start in range(len(words)):
+            node = self.root
+            for length, word in enumerate(words[start : start + self.longest], 1):
+                node = node.get(word)
+                if node is None:
+                    break
+                for key in node.get(self.END, ()):
+                    matches.append((key, start, length))
+        return matches
+
+
+class DomainStore(abc.ABC):
+    def __init__(self, keys):
+        self.index = PhraseIndex()
+        self.size = 0
+        for key in keys:
+            self.index.add(key)
+            self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    @abc.abstractmethod
+    def texts(self, keys):
+        """{key: text} for the given keys"""
+
+    def lookup(self, query, k=None):
+        """Matching entries as [(key, text, score)], best first"""
+        # Score: matched words, then earlier position
+        matches = sorted(self.index.find(query), key=lambda m: (-m[2], m[1]))
+        best, spans = {}, []
+        for key, start, length in matches:
+            if k is not None and len(best) >= k:
+                break
+            end = start + length
+            if key in best or any(
+                s <= start and end <= e and e - s > length for s, e in spans
+            ):
+                continue
+            best[key] = length
+            spans.append((start, end))
+        ranked = list(best)
+        texts = self.texts(ranked)
+        return [(key, texts[key], best[key]) for key in ranked if key in texts]
+
+
+class DictDomainStore(DomainStore):
+    def __init__(self, data):
+        self.data = dict(data)
+        super().__init__(self.data)
+
+    def texts(self, keys):
+        return {key: self.data[key] for key in keys}
+
+
+class SQLiteDomainStore(DomainStore):
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT key FROM domain_data")]
+        super().__init__(keys)
+
+    def texts(self, keys):
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, text FROM domain_data WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        return dict(rows)
+
+
+def open_domain_store(path=None, default=None):
+    """Store for `path` (.json or .db/.sqlite), or the `default` dict when unset"""
+    if not path:
+        return DictDomainStore(default or {})
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return DictDomainStore(json.load(f))
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return SQLiteDomainStore(path)
+
+
+def build_sqlite(data, path):
+    """Write {key: text} into a SQLite domain store"""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS domain_data (key TEXT PRIMARY KEY, text TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO domain_data (key, text) VALUES (?, ?)", data.items()
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python domain_store.py data.json domain.db")
+    with open(sys.argv[1], encoding="utf-8") as f:
+        entries = json.load(f)
+    build_sqlite(entries, sys.argv[2])
+    print(f"Wrote {len(entries)} entries to {sys.argv[2]}")
@@ -0,0 +1,205 @@
+"""
+Model loading for demo_2, kept off the import path.
+
+ModelLoader loads the tokenizer and model in one of three modes
+(RAG_MODEL_LOAD):
+
+- "background" (default): a thread starts loading at once, so the app
+  serves /healthz immediately and /ready turns 200 when the model is in.
+- "lazy": nothing is loaded until the first request (or /ready probe)
+  needs the model; the load then runs in the background as well.
+- "eager": load before the app starts, as before.
+
+Request paths call get() with a timeout and answer 503 on ModelUnavailable
+instead of blocking until the load finishes.
+
+Weights are read from safetensors where the checkpoint has them; those are
+memory-mapped instead of unpickled. RAG_MODEL_VARIANT picks what is served:
+
+- "fp32": the checkpoint as is.
+- "int8": nn.Linear layers dynamically quantized to int8 for CPU. The
+  quantized state_dict is saved under RAG_MODEL_CACHE, and later starts
+  load it (weights_only) into a freshly quantized skeleton instead of
+  loading fp32 and quantizing again. The file name carries the model
+  revision and the torch / transformers versions, so an upgrade of either,
+  or a new checkpoint, builds a new file.
+- "compiled": the model's forward goes through torch.compile. Inductor's
+  FX graph cache lives under RAG_MODEL_CACHE, so restarts reuse compiled
+  kernels instead of compiling from scratch.
+
+benchmark_startup.py compares startup time and per-request latency of the
+variants.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import torch
+import transformers
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+MODEL_CACHE = os.environ.get("RAG_MODEL_CACHE", "model_cache")
+VARIANTS = ("fp32", "int8", "compiled")
+MODES = ("background", "lazy", "eager")
+
+
+class ModelUnavailable(RuntimeError):
+    """The model is still loading (get() timed out) or failed to load."""
+
+
+def load_pretrained(model_name):
+    """fp32 model from safetensors when available, else the pickled weights."""
+    try:
+        return AutoModelForSeq2SeqLM.from_pretrained(model_name, use_safetensors=True)
+    except (OSError, EnvironmentError):
+        return AutoModelForSeq2SeqLM.from_pretrained(model_name)
+
+
+def _cache_path(model_name, suffix):
+    if os.path.isdir(model_name):
+        safe_name = os.path.basename(os.path.normpath(model_name))
+    else:
+        safe_name = model_name.strip("/").replace("/", "--")
+    return os.path.join(MODEL_CACHE, f"{safe_name}{suffix}")
+
+
+def quantize_int8(model):
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _revision(model_name, config):
+    """Hub commit of the checkpoint, or for a local directory its files' sizes and mtimes."""
+    if getattr(config, "_commit_hash", None):
+        return config._commit_hash
+    if os.path.isdir(model_name):
+        return ";".join(
+            f"{entry.name}:{entry.stat().st_size}:{entry.stat().st_mtime_ns}"
+            for entry in sorted(os.scandir(model_name), key=lambda e: e.name)
+            if entry.is_file()
+        )
+    return "unknown"
+
+
+def load_int8(model_name):
+    """int8 model from the on-disk cache, building and saving it on first use."""
+    config = AutoConfig.from_pretrained(model_name)
+    key = f"{_revision(model_name, config)}|torch {torch.__version__}|transformers {transformers.__version__}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+    path = _cache_path(model_name, f"-int8-{digest}.pt")
+    if os.path.exists(path):
+        # Tensors only: quantize an untrained skeleton, then fill in the cached weights
+        model = quantize_int8(AutoModelForSeq2SeqLM.from_config(config).eval())
+        model.load_state_dict(torch.load(path, weights_only=True))
+        return model
+
+    model = quantize_int8(load_pretrained(model_name).eval())
+    os.makedirs(MODEL_CACHE, exist_ok=True)
+    tmp = path + ".tmp"
+    torch.save(model.state_dict(), tmp)
+    os.replace(tmp, path)
+    return model
+
+
+def compile_model(model, model_name):
+    """torch.compile the forward, with Inductor's graph cache on local disk."""
+    cache_dir = _cache_path(model_name, "-inductor")
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.abspath(cache_dir))
+    torch._inductor.config.fx_graph_cache = True
+    model.forward = torch.compile(model.forward, dynamic=True)
+    return model
+
+
+def load_model(model_name, variant="fp32"):
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}', expected one of {VARIANTS}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if variant == "int8":
+        model = load_int8(model_name)
+    else:
+        model = load_pretrained(model_name)
+        if variant == "compiled":
+            model = compile_model(model, model_name)
+    return tokenizer, model.eval()
+
+
+class ModelLoader:
+    def __init__(self, model_name, variant="fp32", mode="background"):
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown model variant '{variant}', expected one of {VARIANTS}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown model load mode '{mode}', expected one of {MODES}")
+        self.model_name = model_name
+        self.variant = variant
+        self.mode = mode
+        self.state = "not_loaded"
+        self.error = None
+        self.load_seconds = None
+        self._tokenizer = None
+        self._model = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()  # held for the whole load
+        self._start_lock = threading.Lock()
+        self._started = False
+
+        if mode == "eager":
+            self._load()
+        elif mode == "background":
+            self.start()
+
+    def start(self):
+        """Start loading in a background thread, unless a load already started."""
+        with self._start_lock:
+            if self._started or self._ready.is_set():
+                return
+            self._started = True
+        threading.Thread(target=self._load, name="model-load", daemon=True).start()
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self.error is None
+
+    def _load(self):
+        with self._lock:
+            if self._ready.is_set():
+                return
+            self.state = "loading"
+            start = time.perf_counter()
+            try:
+                self._tokenizer, self._model = load_model(self.model_name, self.variant)
+            except Exception as e:
+                print(f"Model load failed: {e}")
+                self.error = str(e)
+                self.state = "failed"
+            else:
+                self.load_seconds = round(time.perf_counter() - start, 2)
+                self.state = "ready"
+                print(f"Model {self.model_name} ({self.variant}) loaded in {self.load_seconds}s")
+            finally:
+                self._ready.set()
+
+    def get(self, timeout=None):
+        """
+        (tokenizer, model), starting or waiting for the load as needed.
+        Raises ModelUnavailable if it is not in within `timeout` seconds.
+        """
+        self.start()
+        if not self._ready.wait(timeout):
+            raise ModelUnavailable("Model is still loading")
+        if self.error:
+            raise ModelUnavailable(f"Model failed to load: {self.error}")
+        return self._tokenizer, self._model
+
+    def status(self):
+        return {
+            "model": self.model_name,
+            "variant": self.variant,
+            "mode": self.mode,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
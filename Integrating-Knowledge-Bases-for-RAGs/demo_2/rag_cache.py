@@ -0,0 +1,204 @@
+"""
+Caching for the demo_2 RAG pipeline.
+
+Level 1 - source text. A fetcher turns a query into source text (or None).
+SourceCache keeps the results on disk for `ttl` seconds, so repeated queries
+skip the Wikipedia round trip. Fetchers are pluggable: WikipediaFetcher is
+the default, and LocalFetcher serves a dict/JSON file of texts for offline
+runs and tests (RAG_FETCHER=local RAG_LOCAL_SOURCES=sources.json).
+
+Level 2 - generated summaries, keyed by a hash of the model name, the
+combined context and the generation parameters. The key changes whenever the
+output could, so these entries never expire; only the size bounds apply.
+
+Both levels are a DiskCache: JSON files under a directory, plus an in-memory
+LRU in front so hot entries don't touch the disk.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.environ.get("RAG_CACHE_DIR", "rag_cache")
+SOURCE_TTL = int(os.environ.get("RAG_SOURCE_TTL", 24 * 3600))
+
+
+def cache_key(*parts):
+    """SHA-256 over JSON-encoded parts (dicts are key-sorted)."""
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, directory, ttl=None, memory_size=256, max_files=10_000):
+        self.directory = directory
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _fresh(self, stored_at):
+        return self.ttl is None or time.time() - stored_at < self.ttl
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def lookup(self, key):
+        """(True, value) on a fresh hit, (False, None) otherwise."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = None
+
+        with self._lock:
+            if stored is not None and self._fresh(stored["stored_at"]):
+                self._remember(key, (stored["stored_at"], stored["value"]))
+                self.hits += 1
+                return True, stored["value"]
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value):
+        stored_at = time.time()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": stored_at, "value": value}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self._lock:
+            self._remember(key, (stored_at, value))
+            self._writes += 1
+            evict = self._writes % 100 == 0
+        if evict:
+            self._evict()
+
+    def _evict(self):
+        """Keep at most max_files on disk, dropping the least recently written."""
+        files = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.directory)
+            for name in names
+            if name.endswith(".json")
+        ]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=lambda p: os.stat(p).st_mtime)
+        for path in files[: len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "in_memory": len(self._memory),
+            }
+
+
+# --- fetchers ---
+
+
+class WikipediaFetcher:
+    name = "wikipedia"
+
+    def __init__(self, language="en", user_agent="RAGDemo/1.0 (bletort@bellsouth.net)"):
+        import wikipediaapi
+
+        self.language = language
+        self.wiki = wikipediaapi.Wikipedia(language=language, user_agent=user_agent)
+
+    def fetch(self, query):
+        page = self.wiki.page(query)
+        return page.summary if page.exists() else None
+
+
+class LocalFetcher:
+    """Source texts from a dict (or a JSON file of {title: text}); no network."""
+
+    name = "local"
+
+    def __init__(self, sources):
+        if isinstance(sources, str):
+            with open(sources, encoding="utf-8") as f:
+                sources = json.load(f)
+        self.sources = {title.lower(): text for title, text in sources.items()}
+
+    def fetch(self, query):
+        return self.sources.get(query.lower())
+
+
+def make_fetcher():
+    """Fetcher chosen by RAG_FETCHER (wikipedia | local)."""
+    if os.environ.get("RAG_FETCHER", "wikipedia") == "local":
+        return LocalFetcher(os.environ.get("RAG_LOCAL_SOURCES", "sources.json"))
+    return WikipediaFetcher()
+
+
+class SourceCache:
+    """Level 1: fetcher results on disk with a TTL (misses are cached too)."""
+
+    def __init__(self, fetcher, directory=None, ttl=SOURCE_TTL):
+        self.fetcher = fetcher
+        self.cache = DiskCache(directory or os.path.join(CACHE_DIR, "sources"), ttl=ttl)
+
+    def fetch(self, query):
+        key = cache_key(self.fetcher.name, getattr(self.fetcher, "language", ""), query)
+        found, text = self.cache.lookup(key)
+        if not found:
+            text = self.fetcher.fetch(query)
+            self.cache.store(key, text)
+        return text
+
+
+class SummaryCache:
+    """Level 2: generated text keyed by model, context and generation params."""
+
+    def __init__(self, directory=None, memory_size=1024):
+        self.cache = DiskCache(
+            directory or os.path.join(CACHE_DIR, "summaries"), memory_size=memory_size
+        )
+
+    def get(self, model_name, context, params):
+        """The cached summary, or None"""
+        return self.cache.lookup(cache_key(model_name, context, params))[1]
+
+    def put(self, model_name, context, params, summary):
+        self.cache.store(cache_key(model_name, context, params), summary)
+
+    def get_or_generate(self, model_name, context, params, generate):
+        key = cache_key(model_name, context, params)
+        found, summary = self.cache.lookup(key)
+        if not found:
+            summary = generate(context)
+            self.cache.store(key, summary)
+        return summary
@@ -0,0 +1,136 @@
+"""
+Concurrency helpers for the demo_2 RAG pipeline.
+
+fan_out() queries every retrieval source at once on a shared thread pool.
+Each source has its own timeout: a slow source is reported as missing, and
+it keeps running in the background, so a cached fetcher still fills its
+cache for the next request.
+
+BatchingGenerator owns the model. Request threads submit a context and
+wait on a Future. A single worker thread collects whatever is queued (up to
+max_batch_size, waiting at most max_wait seconds for more) and runs one
+padded generate call for the whole batch. Concurrent users then share a
+beam search instead of queueing behind each other.
+
+LatencyStats keeps recent latencies (e.g. time to first token) for /stats.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+_retrieval_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="retrieve")
+
+
+def fan_out(sources, query, timeouts=None, default_timeout=5.0):
+    """
+    Call every `sources[name](query)` concurrently. Returns {name: result},
+    with None for sources that failed or did not answer within their timeout.
+    """
+    timeouts = timeouts or {}
+    start = time.monotonic()
+    futures = {name: _retrieval_pool.submit(fetch, query) for name, fetch in sources.items()}
+
+    results = {}
+    for name, future in futures.items():
+        remaining = start + timeouts.get(name, default_timeout) - time.monotonic()
+        try:
+            results[name] = future.result(timeout=max(0.0, remaining))
+        except FutureTimeout:
+            print(f"Source '{name}' timed out for '{query}'")
+            results[name] = None
+        except Exception as e:
+            print(f"Source '{name}' failed for '{query}': {e}")
+            results[name] = None
+    return results
+
+
+class BatchingGenerator:
+    def __init__(self, generate_batch, max_batch_size=8, max_wait=0.02):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="generate", daemon=True)
+        self._worker.start()
+
+    def submit(self, context):
+        future = Future()
+        self._queue.put((context, future))
+        return future
+
+    def generate(self, context, timeout=None):
+        return self.submit(context).result(timeout=timeout)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take anything that is already queued
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            batch = [(c, f) for c, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outputs = self.generate_batch([context for context, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            self.batches += 1
+            self.requests += len(batch)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+class LatencyStats:
+    """The last `size` latencies in seconds, summarised in milliseconds."""
+
+    def __init__(self, size=1000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": 0}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1e3, 1)
+
+        return {
+            "count": len(samples),
+            "mean_ms": round(sum(samples) / len(samples) * 1e3, 1),
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+        }
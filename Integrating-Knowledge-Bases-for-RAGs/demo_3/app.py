@@ -1,67 +1,95 @@
 # Step 1: Load libraries and create Flask application
 from flask import Flask, request, render_template, jsonify
 import spacy
-from rdflib import Graph, URIRef, Literal, Namespace
-from rdflib.namespace import RDF, FOAF
-import numpy as np
-from sklearn.decomposition import PCA
+from rdflib import Graph
 import json
+import os
+import threading
+
+from kb_embeddings import load_or_compute
+from kb_graph import kb_version, open_graph, remove_old_stores
+from kb_index import KnowledgeIndex
 
 app = Flask(__name__)
 
+KB_PATH = "knowledge_base.json"
+
 
 # Step 2: Entity Linking Using SpaCy
-def entity_linking(text):
-    nlp = spacy.load("en_core_web_sm")
+def entity_linking(text, nlp=None):
+    if nlp is None:
+        nlp = state.nlp
     doc = nlp(text)
     entities = [(ent.text, ent.label_) for ent in doc.ents]
     return entities
 
 
-# Step 3: Load Knowledge Base from JSON and Create Knowledge Graph
-def load_knowledge_base():
-    with open("knowledge_base.json", "r") as kb_file:
+# Step 3: Load Knowledge Base from JSON
+def load_knowledge_base(kb_path=KB_PATH):
+    with open(kb_path, "r") as kb_file:
         knowledge_base = json.load(kb_file)
     return knowledge_base
 
 
-# Step 4: Create an RDF Knowledge Graph
-def create_knowledge_graph(knowledge_base):
-    g = Graph()
-    EX = Namespace("http://example.org/")
-
-    # Iterate over the knowledge base and add triples to the graph
-    for key, value in knowledge_base.items():
-        # Simple parsing to extract subject, predicate, and object from key
-        subject_name, predicate_object = key.split(" founded ")
-        subject = URIRef(f"http://example.org/{subject_name.replace(' ', '')}")
-        predicate = URIRef(f"http://example.org/founded")
-        obj = URIRef(f"http://example.org/{predicate_object.replace(' ', '')}")
-
-        g.add((subject, RDF.type, FOAF.Person))
-        g.add((subject, FOAF.name, Literal(subject_name)))
-        g.add((subject, predicate, obj))
-        g.add((obj, RDF.type, URIRef(f"http://example.org/Company")))
-        g.add((obj, FOAF.name, Literal(predicate_object)))
-
-    nodes = list(g.all_nodes())
-    node_embeddings = np.random.rand(len(nodes), 10)
-    pca = PCA(n_components=2)
-    reduced_embeddings = pca.fit_transform(node_embeddings)
-
-    return g, reduced_embeddings
-
-
-# Step 5: Knowledge-Guided Retrieval
-def knowledge_guided_retrieval(query, knowledge_base):
-    if "founded" in query.lower():
-        for key in knowledge_base:
-            if "founded" in key and key.split(" ")[-1] in query:
-                query = key
-                break
-
-    response = knowledge_base.get(query, "No relevant information found.")
-    return response
+# Step 4: Knowledge-Guided Retrieval
+def knowledge_guided_retrieval(query, kb_index):
+    answers = kb_index.answers(query)
+    return answers or ["No relevant information found."]
+
+
+# Step 5: Application State
+class KnowledgeState:
+    """
+    Holds everything that is expensive to build: the spaCy pipeline (loaded
+    once) and the knowledge base with its graph and embeddings (rebuilt only
+    when knowledge_base.json changes on disk).
+    """
+
+    def __init__(self, kb_path=KB_PATH):
+        self.kb_path = kb_path
+        self.nlp = spacy.load("en_core_web_sm")
+        self.knowledge_base = {}
+        self.index = KnowledgeIndex({})
+        self.graph = Graph()
+        self.graph_size = 0
+        self.embeddings = None  # NodeEmbeddings
+        self.kb_mtime = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Reload the knowledge base if the file changed since the last load."""
+        mtime = os.path.getmtime(self.kb_path)
+        if mtime == self.kb_mtime:
+            return
+        with self._lock:
+            if mtime == self.kb_mtime:  # another request reloaded it meanwhile
+                return
+            # Parsed once: the index keeps the dict, the graph is built from its items
+            knowledge_base = load_knowledge_base(self.kb_path)
+            index = KnowledgeIndex(knowledge_base)
+            version = kb_version(self.kb_path)
+            # On disk, each KB version has its own store, so the old graph stays open
+            graph = open_graph(self.kb_path, items=knowledge_base.items())
+            try:
+                graph_size = len(graph)
+                # Node vectors and their 2-D projection are cached on disk per KB version
+                embeddings = load_or_compute(graph, version)
+            except Exception:
+                graph.close()
+                raise
+            # Build first, then swap, so requests never see a half-built graph
+            self.knowledge_base, self.index, self.graph_size = knowledge_base, index, graph_size
+            old_graph, self.graph = self.graph, graph
+            self.embeddings = embeddings
+            self.kb_mtime = mtime
+            # Release the previous store handle (and its lock), then its files
+            old_graph.close()
+            remove_old_stores(version)
+            print(f"Knowledge base loaded: {len(knowledge_base)} entries, {graph_size} triples")
+
+
+state = KnowledgeState()
 
 
 # Step 6: Flask Routes
@@ -73,12 +101,33 @@ def index():
 @app.route("/process", methods=["POST"])
 def process():
     text = request.form["inputText"]
+    state.refresh()
     entities = entity_linking(text)
-    knowledge_base = load_knowledge_base()
-    graph, embeddings = create_knowledge_graph(knowledge_base)
-    response = knowledge_guided_retrieval(text, knowledge_base)
+    response = knowledge_guided_retrieval(text, state.index)
+    return jsonify(
+        {"entities": entities, "response": response, "graph_size": state.graph_size}
+    )
+
+
+@app.route("/similar")
+def similar():
+    """Nearest graph nodes to ?node=<uri> by embedding similarity."""
+    node = request.args.get("node", "")
+    k = request.args.get("k", 5, type=int)
+    state.refresh()
+    embeddings = state.embeddings
+    if node not in embeddings.row:
+        return jsonify({"error": f"Unknown node: {node}"}), 404
+    neighbours = embeddings.nearest(node, k)
     return jsonify(
-        {"entities": entities, "response": response, "graph_size": len(graph)}
+        {
+            "node": node,
+            "position": embeddings.projection[embeddings.row[node]].tolist(),
+            "similar": [
+                {"node": n, "score": score, "position": embeddings.projection[embeddings.row[n]].tolist()}
+                for n, score in neighbours
+            ],
+        }
     )
 
 
@@ -0,0 +1,78 @@
+"""
+Compare the old linear-scan retrieval with KnowledgeIndex on a synthetic
+knowledge base.
+
+    python benchmark_retrieval.py --triples 100000
+"""
+import argparse
+import random
+import time
+
+from kb_index import KnowledgeIndex
+
+
+# knowledge_guided_retrieval in app.py before 0bbf022
+def linear_retrieval(query, knowledge_base):
+    if "founded" in query.lower():
+        for key in knowledge_base:
+            if "founded" in key and key.split(" ")[-1] in query:
+                query = key
+                break
+    return knowledge_base.get(query, "No relevant information found.")
+
+
+def synthetic_kb(n, seed=42):
+    rng = random.Random(seed)
+    kb = {}
+    people = max(1, n // 3)
+    for i in range(n):
+        person = f"Person{rng.randrange(people)} Surname{i % 997}"
+        company = f"Company{i:07d}"  # fixed width: no name is a prefix of another
+        kb[f"{person} founded {company}"] = f"{person} is the founder of {company}."
+    return kb
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--triples", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    kb = synthetic_kb(args.triples)
+    keys = list(kb)
+    rng = random.Random(0)
+    sample = [rng.choice(keys) for _ in range(args.queries)]
+    who = [f"Who founded {k.split(' founded ')[1]}?" for k in sample]
+    what = [f"What did {k.split(' founded ')[0]} found?" for k in sample]
+
+    start = time.perf_counter()
+    index = KnowledgeIndex(kb)
+    build = time.perf_counter() - start
+
+    print(f"Knowledge base: {len(kb):,} triples, index built in {build:.2f}s")
+    print(
+        f"{'query':<18}{'linear scan':>13}{'found':>7}{'index':>12}{'found':>7}{'matches':>9}"
+    )
+
+    # The linear scan is slow on large KBs, so time it on fewer queries
+    linear_n = max(1, args.queries // 20)
+    for label, queries in (("who founded X", who), ("what did Y found", what)):
+        linear, linear_results = timed(lambda q: linear_retrieval(q, kb), queries[:linear_n])
+        indexed, index_results = timed(index.search, queries)
+        linear_found = sum(r == kb[k] for r, k in zip(linear_results, sample)) / linear_n
+        index_found = sum(k in r for r, k in zip(index_results, sample)) / len(queries)
+        matches = sum(map(len, index_results)) / len(queries)
+        print(
+            f"{label:<18}{linear * 1e3:>11.3f}ms{linear_found:>7.0%}"
+            f"{indexed * 1e3:>10.3f}ms{index_found:>7.0%}{matches:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
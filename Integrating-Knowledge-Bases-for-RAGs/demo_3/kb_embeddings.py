@@ -0,0 +1,155 @@
+"""
+Node embeddings for the knowledge graph.
+
+Each entity node gets a vector built from its label text (hashed character
+trigrams of its foaf:name, or of the URI's local name) averaged with the
+vectors of its neighbours, so nodes that are named alike or linked together
+end up close. Vectors are computed once per knowledge-base version and stored
+next to the app:
+
+    embeddings/<kb version>/
+        nodes.json       node ids, row i -> node i
+        vectors.npy      float32 [n_nodes, DIM], L2-normalised, memory-mapped
+        projection.npy   float32 [n_nodes, 2], PCA projection for plotting
+
+Each process writes into its own temporary directory; the rename into place
+and the removal of older versions happen under embeddings/.lock, so several
+workers can start on the same knowledge base at once.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import zlib
+
+import numpy as np
+from filelock import FileLock
+from rdflib import URIRef
+from rdflib.namespace import FOAF, RDF
+from scipy import sparse
+from sklearn.decomposition import PCA
+
+DIM = 64
+EMBEDDINGS_DIR = "embeddings"
+
+
+def _label(node, names):
+    if node in names:
+        return names[node]
+    local = re.split(r"[/#]", str(node))[-1]
+    return re.sub(r"(?<=[a-z])(?=[A-Z])", " ", local)
+
+
+def _text_vectors(labels):
+    """Hashed character-trigram counts, one row per label."""
+    rows, cols = [], []
+    for i, label in enumerate(labels):
+        padded = f"  {label.lower()} "
+        for j in range(len(padded) - 2):
+            rows.append(i)
+            cols.append(zlib.crc32(padded[j : j + 3].encode()) % DIM)
+    data = np.ones(len(rows), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(labels), DIM)).toarray()
+
+
+def _normalise(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def compute_embeddings(graph):
+    """
+    Return (node ids, vectors) for every entity node. Class nodes reached via
+    rdf:type are left out: every person links to foaf:Person, which would
+    make all people look alike.
+    """
+    names = {s: str(o) for s, o in graph.subject_objects(FOAF.name)}
+    links = [
+        (s, o)
+        for s, p, o in graph
+        if p != RDF.type and isinstance(s, URIRef) and isinstance(o, URIRef)
+    ]
+    nodes = sorted({s for s in graph.subjects() if isinstance(s, URIRef)} | {o for _, o in links})
+    row = {node: i for i, node in enumerate(nodes)}
+
+    text = _normalise(_text_vectors([_label(node, names) for node in nodes]))
+
+    # One round of neighbour averaging over the (undirected) entity graph
+    edges = [(row[s], row[o]) for s, o in links]
+    if edges:
+        src, dst = np.array(edges).T
+        n = len(nodes)
+        adjacency = sparse.coo_matrix(
+            (np.ones(2 * len(edges), dtype=np.float32), (np.r_[src, dst], np.r_[dst, src])),
+            shape=(n, n),
+        ).tocsr()
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        degree[degree == 0] = 1.0
+        neighbours = sparse.diags(1.0 / degree) @ adjacency @ text
+        # Own label weighs more than the neighbourhood, so linked nodes stay distinct
+        vectors = _normalise(text + 0.5 * neighbours)
+    else:
+        vectors = text
+
+    return [str(node) for node in nodes], vectors.astype(np.float32)
+
+
+class NodeEmbeddings:
+    """Memory-mapped node vectors and their 2-D projection for one KB version."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "nodes.json"), "r") as f:
+            self.nodes = json.load(f)
+        self.row = {node: i for i, node in enumerate(self.nodes)}
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.projection = np.load(os.path.join(directory, "projection.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def nearest(self, node, k=5):
+        """The k nodes most similar to `node` (cosine), excluding itself."""
+        i = self.row[node]
+        scores = self.vectors @ self.vectors[i]
+        scores[i] = -np.inf
+        k = min(k, len(self.nodes) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.nodes[j], float(scores[j])) for j in top]
+
+
+def load_or_compute(graph, version, base_dir=EMBEDDINGS_DIR):
+    """Load the embeddings for `version`, computing and storing them if needed."""
+    directory = os.path.join(base_dir, version)
+    if not os.path.exists(os.path.join(directory, "projection.npy")):
+        nodes, vectors = compute_embeddings(graph)
+        if len(nodes) >= 2:
+            projection = PCA(n_components=2).fit_transform(vectors)
+        else:
+            projection = np.zeros((len(nodes), 2))
+
+        os.makedirs(base_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=base_dir, prefix=".tmp-")
+        try:
+            with open(os.path.join(tmp, "nodes.json"), "w") as f:
+                json.dump(nodes, f)
+            np.save(os.path.join(tmp, "vectors.npy"), vectors)
+            np.save(os.path.join(tmp, "projection.npy"), projection.astype(np.float32))
+
+            with FileLock(os.path.join(base_dir, ".lock")):
+                # Replace older versions with this one; other workers' temp dirs are left alone
+                for old in os.listdir(base_dir):
+                    if old != version and not old.startswith("."):
+                        shutil.rmtree(os.path.join(base_dir, old), ignore_errors=True)
+                if not os.path.exists(os.path.join(directory, "projection.npy")):
+                    shutil.rmtree(directory, ignore_errors=True)
+                    os.replace(tmp, directory)
+        finally:
+            # Left over when another worker stored this version first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    return NodeEmbeddings(directory)
@@ -0,0 +1,159 @@
+"""
+Bulk construction of the RDF knowledge graph.
+
+Triples are added to rdflib in batches with `addN` instead of one `add` per
+triple.
+
+By default the graph lives in rdflib's in-memory store and is rebuilt at
+start-up. For knowledge bases larger than memory, or to skip ingestion on
+later starts, set KB_GRAPH_STORE to an on-disk rdflib store (for example
+"BerkeleyDB", which needs the `berkeleydb` package) and KB_GRAPH_STORE_PATH to
+its location. Each version of knowledge_base.json gets its own store next to
+that path, so a new version can be built while the old one is still open;
+remove_old_stores() deletes the others once the new one is in use.
+
+    python kb_graph.py knowledge_base.json --export knowledge_graph.nt
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import shutil
+import time
+
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDF, FOAF
+
+from kb_index import parse_key
+
+EX = "http://example.org/"
+FOUNDED = URIRef(f"{EX}founded")
+COMPANY = URIRef(f"{EX}Company")
+GRAPH_ID = URIRef(f"{EX}knowledge-base")
+
+KB_GRAPH_STORE = os.getenv("KB_GRAPH_STORE", "Memory")
+KB_GRAPH_STORE_PATH = os.getenv("KB_GRAPH_STORE_PATH", "knowledge_graph.db")
+BATCH_SIZE = 50_000
+
+
+def kb_version(kb_path):
+    """Identify a knowledge base file by modification time and size."""
+    stat = os.stat(kb_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def iter_triples(items):
+    """Five triples per "<person> founded <company>" entry; other keys are skipped."""
+    for key, _ in items:
+        triple = parse_key(key)
+        if triple is None:
+            continue
+        subject_name, _, object_name = triple
+        subject = URIRef(f"{EX}{subject_name.replace(' ', '')}")
+        obj = URIRef(f"{EX}{object_name.replace(' ', '')}")
+
+        yield subject, RDF.type, FOAF.Person
+        yield subject, FOAF.name, Literal(subject_name)
+        yield subject, FOUNDED, obj
+        yield obj, RDF.type, COMPANY
+        yield obj, FOAF.name, Literal(object_name)
+
+
+def ingest(graph, items, batch_size=BATCH_SIZE):
+    """Add triples in batches; returns the number of triples added."""
+    triples = iter_triples(items)
+    added = 0
+    while True:
+        batch = list(itertools.islice(triples, batch_size))
+        if not batch:
+            return added
+        graph.addN((s, p, o, graph) for s, p, o in batch)
+        added += len(batch)
+
+
+def _meta_path(location):
+    return f"{location}.meta.json"
+
+
+def _store_location(store_path, version):
+    return f"{store_path}.{version}"
+
+
+def open_graph(kb_path, store=KB_GRAPH_STORE, store_path=KB_GRAPH_STORE_PATH, items=None):
+    """
+    Return the graph for `kb_path`, ingesting it only if the store does not
+    already hold this version of the knowledge base. Pass `items` when the
+    caller has already parsed the file, so it is not read a second time.
+    """
+    start = time.perf_counter()
+    version = kb_version(kb_path)
+    if items is None:
+        with open(kb_path, "r") as kb_file:
+            items = json.load(kb_file).items()
+
+    if store == "Memory":
+        graph = Graph(identifier=GRAPH_ID)
+        ingest(graph, items)
+        print(f"Knowledge graph built in {time.perf_counter() - start:.2f}s")
+        return graph
+
+    location = _store_location(store_path, version)
+    graph = Graph(store=store, identifier=GRAPH_ID)
+    graph.open(location, create=True)
+    try:
+        with open(_meta_path(location), "r") as meta_file:
+            meta = json.load(meta_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        meta = {}
+
+    if meta.get("version") == version:
+        print(f"Knowledge graph opened from {location} ({meta['triples']} triples)")
+        return graph
+
+    # No metadata: new, or an earlier ingest did not finish
+    try:
+        graph.remove((None, None, None))
+        added = ingest(graph, items)
+        graph.commit()
+    except Exception:
+        graph.close()
+        raise
+    with open(_meta_path(location), "w") as meta_file:
+        json.dump({"version": version, "triples": added}, meta_file)
+    print(f"Knowledge graph ingested into {location} in {time.perf_counter() - start:.2f}s")
+    return graph
+
+
+def remove_old_stores(version, store=KB_GRAPH_STORE, store_path=KB_GRAPH_STORE_PATH):
+    """Delete the on-disk stores of every knowledge base version but `version`."""
+    if store == "Memory":
+        return
+    keep = _store_location(store_path, version)
+    for path in glob.glob(f"{glob.escape(store_path)}.*"):
+        if path in (keep, _meta_path(keep)):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def export_snapshot(graph, path):
+    """Write the graph as N-Triples (written to a temp file, then renamed)."""
+    tmp = f"{path}.tmp"
+    graph.serialize(destination=tmp, format="nt", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the knowledge graph")
+    parser.add_argument("kb_path", nargs="?", default="knowledge_base.json")
+    parser.add_argument("--export", help="write an N-Triples snapshot to this path")
+    args = parser.parse_args()
+
+    graph = open_graph(args.kb_path)
+    print(f"{len(graph)} triples")
+    if args.export:
+        export_snapshot(graph, args.export)
+        print(f"Snapshot written to {args.export}")
@@ -0,0 +1,119 @@
+"""
+Retrieval index over the knowledge base.
+
+Keys in knowledge_base.json look like "Bill Gates founded Microsoft". At load
+time each key is parsed into a (subject, predicate, object) triple and stored
+in three maps:
+
+- subject tokens -> keys   ("what did Bill Gates found")
+- object tokens  -> keys   ("who founded Microsoft")
+- token          -> keys   (inverted index for partial matches)
+
+A query is matched by looking up its n-grams in the subject/object maps, so
+the cost depends on the query length, not on the size of the knowledge base.
+"""
+import re
+from collections import defaultdict
+
+PREDICATES = ("founded",)
+
+# Words that signal the founding relation in a question
+FOUNDING_WORDS = {"found", "founded", "founder", "founders", "co-founded", "cofounded"}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "by", "did", "do", "does", "for", "is", "of",
+    "the", "to", "was", "what", "which", "who", "whom", "with",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+
+def tokenize(text):
+    return tuple(TOKEN_RE.findall(text.lower()))
+
+
+def parse_key(key):
+    """Split "Bill Gates founded Microsoft" into (subject, predicate, object)."""
+    for predicate in PREDICATES:
+        marker = f" {predicate} "
+        if marker in key:
+            subject, obj = key.split(marker, 1)
+            return subject.strip(), predicate, obj.strip()
+    return None
+
+
+class KnowledgeIndex:
+    def __init__(self, knowledge_base):
+        self.knowledge_base = knowledge_base
+        self.exact = {}  # lowercased key -> key
+        self.by_subject = defaultdict(list)  # subject tokens -> keys
+        self.by_object = defaultdict(list)  # object tokens -> keys
+        self.tokens = defaultdict(list)  # token -> keys
+        self.max_entity_len = 1
+
+        for key in knowledge_base:
+            self.exact[key.lower().strip()] = key
+            for token in set(tokenize(key)):
+                if token not in STOPWORDS:
+                    self.tokens[token].append(key)
+
+            triple = parse_key(key)
+            if triple is None:
+                continue
+            subject, _, obj = triple
+            subject_tokens, object_tokens = tokenize(subject), tokenize(obj)
+            self.by_subject[subject_tokens].append(key)
+            self.by_object[object_tokens].append(key)
+            self.max_entity_len = max(
+                self.max_entity_len, len(subject_tokens), len(object_tokens)
+            )
+
+    def __len__(self):
+        return len(self.knowledge_base)
+
+    def _mentions(self, tokens, table):
+        """Keys whose entity (in `table`) appears as an n-gram of the query."""
+        found = []
+        for n in range(min(self.max_entity_len, len(tokens)), 0, -1):
+            for i in range(len(tokens) - n + 1):
+                found.extend(table.get(tokens[i : i + n], ()))
+        return found
+
+    def _partial(self, tokens):
+        """Rank keys by how many distinct query tokens they contain."""
+        scores = defaultdict(int)
+        for token in set(tokens):
+            if token in STOPWORDS or token in FOUNDING_WORDS:
+                continue
+            for key in self.tokens.get(token, ()):
+                scores[key] += 1
+        if not scores:
+            return []
+        best = max(scores.values())
+        return sorted((k for k, s in scores.items() if s == best), key=str)
+
+    def search(self, query):
+        """Return every matching key, most specific match first."""
+        key = self.exact.get(query.lower().strip())
+        if key is not None:
+            return [key]
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        subjects = self._mentions(tokens, self.by_subject)
+        objects = self._mentions(tokens, self.by_object)
+
+        if subjects and objects:
+            # Both ends named: the exact triple(s) if any, else everything about either
+            both = set(subjects) & set(objects)
+            if both:
+                return sorted(both, key=str)
+        if subjects or objects:
+            return list(dict.fromkeys(subjects + objects))
+
+        return self._partial(tokens)
+
+    def answers(self, query):
+        return [self.knowledge_base[key] for key in self.search(query)]
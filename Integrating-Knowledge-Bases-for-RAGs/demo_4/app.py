@@ -1,10 +1,35 @@
-from flask import Flask, request, render_template, jsonify
+from flask import (
+    Flask,
+    Response,
+    request,
+    render_template,
+    jsonify,
+    make_response,
+    stream_with_context,
+)
 from flask_cors import CORS
 import json
 import networkx as nx
 import plotly.graph_objects as go
 import plotly
+import hashlib
+import os
 import re
+import threading
+
+from extraction_jobs import FAILED, JobManager, QueueFull
+from graph_layout import compute_layout
+from kb_search import KnowledgeSearchIndex
+from fallback_ner import extract_entities as extract_fallback_entities
+from relations import extract_relations, proximity_pairs
+from wire_format import (
+    COMPACT_MIMETYPE,
+    COMPRESS_MIN_BYTES,
+    choose_encoding,
+    compact_graph,
+    dumps,
+    encode_body,
+)
 
 app = Flask(__name__)
 
@@ -21,16 +46,35 @@ except (ImportError, OSError):
     print("SpaCy not available. Using fallback pattern matching.")
     nlp = None
 
-# Load knowledge base
-try:
-    with open("knowledge_base.json", "r") as file:
-        knowledge_base = json.load(file)
-except FileNotFoundError:
-    print("Warning: knowledge_base.json not found. Using empty knowledge base.")
-    knowledge_base = {}
+# Pipeline components not needed for NER-only batch extraction
+NER_DISABLE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+KB_PATH = "knowledge_base.json"
+
+GRAPH_COLORS = {
+    "PERSON": "#FF6B6B",
+    "ORG": "#4ECDC4",
+    "GPE": "#45B7D1",
+    "PRODUCT": "#96CEB4",
+    "person": "#FF6B6B",
+    "organization": "#4ECDC4",
+    "location": "#45B7D1",
+    "product": "#96CEB4",
+    "company": "#4ECDC4",
+}
+
+
+def load_knowledge_base():
+    """Load knowledge base"""
+    try:
+        with open(KB_PATH, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        print("Warning: knowledge_base.json not found. Using empty knowledge base.")
+        return {}
 
 
-def create_knowledge_graph():
+def create_knowledge_graph(knowledge_base):
     """Create a network graph from the knowledge base"""
     G = nx.Graph()
 
@@ -53,105 +97,17 @@ def create_knowledge_graph():
 
 def extract_entities_from_text(text):
     """Extract entities from input text using spaCy NER or fallback patterns"""
-    entities = {"PERSON": [], "ORG": [], "GPE": [], "PRODUCT": []}
-
     if nlp is None:
-        # Improved fallback pattern matching
+        # Fallback pattern matching (precompiled, see fallback_ner.py)
+        return extract_fallback_entities(text)
 
-        # Single name pattern (for names like "Bellamy", "Octavia")
-        single_name_pattern = r"\b[A-Z][a-z]{2,}\b"
-
-        # Full name pattern (for names like "John Smith")
-        full_name_pattern = r"\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b"
-
-        # Find full names first
-        full_names = re.findall(full_name_pattern, text)
-        entities["PERSON"].extend(
-            [name for name in full_names if len(name.split()) <= 3]
-        )
-
-        # Find single names that are not part of organizations
-        single_names = re.findall(single_name_pattern, text)
-
-        # Filter out common words and organization indicators
-        common_words = {
-            "The",
-            "This",
-            "That",
-            "Inc",
-            "Corp",
-            "Ltd",
-            "LLC",
-            "Company",
-            "Technologies",
-            "Systems",
-            "Group",
-            "Industries",
-            "Apple",
-            "Microsoft",
-            "Google",
-            "Amazon",
-            "Facebook",
-            "Tesla",
-            "SpaceX",
-        }
-
-        # Add single names that are likely person names
-        for name in single_names:
-            if (
-                name not in common_words
-                and name not in [n.split()[0] for n in entities["PERSON"]]
-                and name not in [n.split()[-1] for n in entities["PERSON"]]
-            ):
+    # Use spaCy NER
+    return entities_from_doc(nlp(text))
 
-                # Check if it's in a person context
-                name_lower = name.lower()
-                person_context_words = [
-                    "brother",
-                    "sister",
-                    "son",
-                    "daughter",
-                    "father",
-                    "mother",
-                    "parent",
-                    "child",
-                    "friend",
-                    "colleague",
-                ]
-
-                text_around_name = ""
-                name_pos = text.lower().find(name_lower)
-                if name_pos != -1:
-                    start = max(0, name_pos - 50)
-                    end = min(len(text), name_pos + len(name) + 50)
-                    text_around_name = text[start:end].lower()
-
-                if any(word in text_around_name for word in person_context_words):
-                    entities["PERSON"].append(name)
-
-        # Organization patterns
-        org_patterns = [
-            r"\b[A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*(?:\s+(?:Inc|Corp|Ltd|LLC|Company|Technologies|Systems|Group|Industries))\b",
-            r"\b(?:Apple|Microsoft|Google|Amazon|Facebook|Tesla|SpaceX|Netflix|Twitter|Meta)\b",
-        ]
-
-        for pattern in org_patterns:
-            orgs = re.findall(pattern, text, re.IGNORECASE)
-            entities["ORG"].extend(orgs)
-
-        # Location pattern
-        location_pattern = r"\b(?:California|New York|Texas|London|Paris|Tokyo|Berlin|Sydney|Toronto|Singapore|USA|UK|Canada|Australia)\b"
-        locations = re.findall(location_pattern, text, re.IGNORECASE)
-        entities["GPE"].extend(locations)
-
-        # Remove duplicates
-        for key in entities:
-            entities[key] = list(set(entities[key]))
-
-        return entities
 
-    # Use spaCy NER
-    doc = nlp(text)
+def entities_from_doc(doc):
+    """Collect the entity types we graph from a spaCy Doc"""
+    entities = {"PERSON": [], "ORG": [], "GPE": [], "PRODUCT": []}
     for ent in doc.ents:
         if ent.label_ in entities:
             entities[ent.label_].append(ent.text)
@@ -163,6 +119,29 @@ def extract_entities_from_text(text):
     return entities
 
 
+def extract_entities_batch(documents, batch_size=64, n_process=1):
+    """
+    Extract entities from an iterable of (doc_id, text) pairs, yielding
+    (doc_id, entities) in the same order. With spaCy the texts go through
+    nlp.pipe with only the NER components enabled.
+    """
+    if nlp is None:
+        for doc_id, text in documents:
+            yield doc_id, extract_entities_from_text(text)
+        return
+
+    disable = [name for name in NER_DISABLE if name in nlp.pipe_names]
+    docs = nlp.pipe(
+        ((text, doc_id) for doc_id, text in documents),
+        as_tuples=True,
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=disable,
+    )
+    for doc, doc_id in docs:
+        yield doc_id, entities_from_doc(doc)
+
+
 def create_graph_from_entities(entities, relationships_text=""):
     """Create a network graph from extracted entities"""
     G = nx.Graph()
@@ -183,38 +162,19 @@ def create_graph_from_entities(entities, relationships_text=""):
     for product in entities["PRODUCT"]:
         G.add_node(product, type="product")
 
-    # Simple relationship detection based on common patterns
+    # Founding and work relationships, from one multi-pattern scan of the text
     text_lower = relationships_text.lower()
-    words = text_lower.split()
-
-    # Look for founding relationships
-    founding_words = ["founded", "started", "created", "established", "co-founded"]
+    founded, works_at = extract_relations(
+        relationships_text, entities["PERSON"], entities["ORG"]
+    )
     for person in entities["PERSON"]:
         for org in entities["ORG"]:
-            person_lower = person.lower()
-            org_lower = org.lower()
-            if person_lower in text_lower and org_lower in text_lower:
-                # Check if they appear in founding context
-                for word in founding_words:
-                    pattern = f"{re.escape(person_lower)}.*{word}.*{re.escape(org_lower)}|{re.escape(org_lower)}.*{word}.*{re.escape(person_lower)}"
-                    if re.search(pattern, text_lower):
-                        G.add_edge(person, org, relation="founded")
-                        break
-
-    # Look for work relationships
-    work_words = ["works at", "ceo of", "president of", "director of", "employed by"]
+            if (person, org) in founded:
+                G.add_edge(person, org, relation="founded")
     for person in entities["PERSON"]:
         for org in entities["ORG"]:
-            person_lower = person.lower()
-            org_lower = org.lower()
-            if person_lower in text_lower and org_lower in text_lower:
-                for word in work_words:
-                    pattern = (
-                        f"{re.escape(person_lower)}.*{word}.*{re.escape(org_lower)}"
-                    )
-                    if re.search(pattern, text_lower):
-                        G.add_edge(person, org, relation="works_at")
-                        break
+            if (person, org) in works_at:
+                G.add_edge(person, org, relation="works_at")
 
     # Look for family relationships with corrected patterns
     family_patterns = [
@@ -327,52 +287,34 @@ def create_graph_from_entities(entities, relationships_text=""):
         entities["PERSON"] + entities["ORG"] + entities["GPE"] + entities["PRODUCT"]
     )
 
-    for i, entity1 in enumerate(all_entities):
-        for entity2 in all_entities[i + 1 :]:
-            if not G.has_edge(entity1, entity2):
-                # Check if entities appear within 5 words of each other
-                entity1_lower = entity1.lower()
-                entity2_lower = entity2.lower()
-
-                # Simple proximity check
-                try:
-                    # Find positions in the original text
-                    text_words = relationships_text.lower().split()
-                    entity1_positions = [
-                        i
-                        for i, word in enumerate(text_words)
-                        if entity1_lower in word
-                        or any(part in word for part in entity1_lower.split())
-                    ]
-                    entity2_positions = [
-                        i
-                        for i, word in enumerate(text_words)
-                        if entity2_lower in word
-                        or any(part in word for part in entity2_lower.split())
-                    ]
-
-                    # Check if any positions are close to each other
-                    for pos1 in entity1_positions:
-                        for pos2 in entity2_positions:
-                            if abs(pos1 - pos2) <= 5:  # Within 5 words
-                                G.add_edge(entity1, entity2, relation="related")
-                                break
-                        if G.has_edge(entity1, entity2):
-                            break
-                except Exception as e:
-                    print(f"Error in proximity check: {e}")
-                    continue
+    for i, j in proximity_pairs(relationships_text, all_entities, window=5):
+        entity1, entity2 = all_entities[i], all_entities[j]
+        if not G.has_edge(entity1, entity2):
+            G.add_edge(entity1, entity2, relation="related")
 
     return G
 
 
-def generate_dynamic_graph_visualization(G):
+def process_text(text):
+    """Entities, graph and layout for one document (the cached unit of work)"""
+    entities = extract_entities_from_text(text)
+    G = create_graph_from_entities(entities, text)
+    pos = compute_layout(G, k=4, iterations=100, seed=42)
+    return {"entities": entities, "graph": G, "pos": pos}
+
+
+# Bounded worker pool + LRU result cache keyed by the SHA-256 of the text
+extraction_jobs = JobManager(process_text)
+
+
+def generate_dynamic_graph_visualization(G, pos=None):
     """Generate Plotly graph visualization from a NetworkX graph"""
     if len(G.nodes()) == 0:
         return "<div style='color: white; text-align: center; padding: 20px;'>No entities found to visualize</div>"
 
-    # Get node positions with better spacing
-    pos = nx.spring_layout(G, k=4, iterations=100, seed=42)
+    # Get node positions with better spacing (pass `pos` to reuse a layout)
+    if pos is None:
+        pos = compute_layout(G, k=4, iterations=100, seed=42)
 
     # Create visible edge traces (lines only)
     edge_x = []
@@ -533,163 +475,15 @@ def generate_dynamic_graph_visualization(G):
     return plot_html
 
 
-def generate_graph_visualization():
+def generate_graph_visualization(knowledge_base):
     """Generate Plotly graph visualization"""
-    G = create_knowledge_graph()
+    G = create_knowledge_graph(knowledge_base)
 
     if len(G.nodes()) == 0:
         return "<div style='color: white; text-align: center; padding: 20px;'>No knowledge base data found</div>"
 
     # Get node positions
-    pos = nx.spring_layout(G, k=3, iterations=50, seed=42)
-
-    # Create visible edge traces (lines only)
-    edge_x = []
-    edge_y = []
-
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-
-    edge_trace = go.Scatter(
-        x=edge_x,
-        y=edge_y,
-        line=dict(width=3, color="#888"),
-        hoverinfo="none",
-        mode="lines",
-        name="Relationships",
-        showlegend=False,
-    )
-
-    # Create invisible hover traces for edges
-    edge_hover_x = []
-    edge_hover_y = []
-    edge_hover_text = []
-
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-
-        # Calculate midpoint
-        mid_x = (x0 + x1) / 2
-        mid_y = (y0 + y1) / 2
-
-        edge_hover_x.append(mid_x)
-        edge_hover_y.append(mid_y)
-
-        # Add edge info for hover
-        relation = G.edges[edge].get("relation", "founded")
-        hover_text = f"<b>{edge[0]} ←→ {edge[1]}</b><br>Relationship: <i>{relation}</i>"
-        edge_hover_text.append(hover_text)
-
-    edge_hover_trace = go.Scatter(
-        x=edge_hover_x,
-        y=edge_hover_y,
-        mode="markers",
-        marker=dict(size=12, color="rgba(0,0,0,0)", line=dict(width=0)),
-        hoverinfo="text",
-        hovertext=edge_hover_text,
-        name="Edge Info",
-        showlegend=False,
-        customdata=[f"{edge[0]}|{edge[1]}" for edge in G.edges()],
-    )
-
-    # Create node traces
-    node_x = []
-    node_y = []
-    node_text = []
-    node_colors = []
-    node_info = []
-
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(node)
-
-        # Color nodes by type
-        node_type = G.nodes[node].get("type", "unknown")
-        if node_type == "person":
-            node_colors.append("#FF6B6B")
-        else:
-            node_colors.append("#4ECDC4")
-
-        # Add node hover info
-        connections = list(G.neighbors(node))
-        connection_info = (
-            f"Connections: {', '.join(connections)}"
-            if connections
-            else "No connections"
-        )
-        node_info.append(
-            f"<b>{node}</b><br>Type: <i>{node_type}</i><br>{connection_info}"
-        )
-
-    node_trace = go.Scatter(
-        x=node_x,
-        y=node_y,
-        mode="markers+text",
-        text=node_text,
-        textposition="middle center",
-        textfont=dict(color="white", size=12),
-        hoverinfo="text",
-        hovertext=node_info,
-        marker=dict(size=35, color=node_colors, line=dict(width=2, color="white")),
-        customdata=list(G.nodes()),
-    )
-
-    # Create the figure
-    fig = go.Figure(
-        data=[edge_trace, edge_hover_trace, node_trace],
-        layout=go.Layout(
-            title=dict(
-                text="Knowledge Base Graph Visualization",
-                font=dict(size=16, color="white"),
-            ),
-            showlegend=False,
-            hovermode="closest",
-            margin=dict(b=20, l=5, r=5, t=40),
-            annotations=[
-                dict(
-                    text="Red nodes: People, Teal nodes: Companies<br><i>Click on nodes to highlight connections</i>",
-                    showarrow=False,
-                    xref="paper",
-                    yref="paper",
-                    x=0.005,
-                    y=-0.05,
-                    xanchor="left",
-                    yanchor="bottom",
-                    font=dict(color="white", size=11),
-                )
-            ],
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="white"),
-        ),
-    )
-
-    # Convert to HTML with toolbar enabled
-    config = {"displayModeBar": True}
-    plot_html = plotly.offline.plot(
-        fig, output_type="div", include_plotlyjs=True, config=config
-    )
-
-    return plot_html
-
-
-def generate_graph_visualization():
-    """Generate Plotly graph visualization"""
-    G = create_knowledge_graph()
-
-    if len(G.nodes()) == 0:
-        return "<div style='color: white; text-align: center; padding: 20px;'>No knowledge base data found</div>"
-
-    # Get node positions
-    pos = nx.spring_layout(G, k=3, iterations=50, seed=42)
+    pos = compute_layout(G, k=3, iterations=50, seed=42)
 
     # Create visible edge traces (lines only)
     edge_x = []
@@ -900,15 +694,64 @@ def generate_graph_visualization():
     return plot_html + custom_js
 
 
-def find_answer(query):
-    """Find answer from knowledge base"""
-    if not knowledge_base:
+class KnowledgeBaseCache:
+    """
+    The knowledge base and its rendered graph, built once per version of
+    knowledge_base.json. The file is stat-ed on each request and everything
+    is rebuilt only when its modification time or size changes.
+    """
+
+    def __init__(self, path=KB_PATH):
+        self.path = path
+        self.version = None
+        self.knowledge_base = {}
+        self.search_index = KnowledgeSearchIndex({})
+        self.graph_div = ""
+        self.home_page = ""
+        self.etag = ""
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return "missing"
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def refresh(self):
+        version = self._file_version()
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            knowledge_base = load_knowledge_base()
+            search_index = KnowledgeSearchIndex(knowledge_base)
+            try:
+                graph_div = generate_graph_visualization(knowledge_base)
+            except Exception as e:
+                graph_div = f"<div style='color: red; text-align: center; padding: 20px;'>Error generating graph: {str(e)}</div>"
+            with app.app_context():
+                home_page = render_template(
+                    "index.html", query="", response="", graph_div=graph_div
+                )
+            self.knowledge_base, self.search_index = knowledge_base, search_index
+            self.graph_div, self.home_page = graph_div, home_page
+            self.etag = hashlib.sha1(home_page.encode("utf-8")).hexdigest()
+            self.version = version
+
+
+kb_cache = KnowledgeBaseCache()
+
+
+def find_answer(query, search_index):
+    """Find the best answer from the knowledge base"""
+    if not len(search_index):
         return "Knowledge base is empty or not loaded."
 
-    query_lower = query.lower()
-    for key, value in knowledge_base.items():
-        if any(word in key.lower() for word in query_lower.split()):
-            return value
+    results = search_index.search(query, k=1)
+    if results:
+        return results[0][1]
     return "I don't have information about that in my knowledge base."
 
 
@@ -916,19 +759,41 @@ def find_answer(query):
 def index():
     query = ""
     response = ""
-
-    try:
-        graph_div = generate_graph_visualization()
-    except Exception as e:
-        graph_div = f"<div style='color: red; text-align: center; padding: 20px;'>Error generating graph: {str(e)}</div>"
+    kb_cache.refresh()
 
     if request.method == "POST":
         query = request.form.get("query", "")
         if query:
-            response = find_answer(query)
+            response = find_answer(query, kb_cache.search_index)
+
+    if not query:
+        # The page only depends on the knowledge base version: serve it from cache
+        if kb_cache.etag in request.if_none_match:
+            return "", 304, {"ETag": f'"{kb_cache.etag}"'}
+        page = make_response(kb_cache.home_page)
+        page.set_etag(kb_cache.etag)
+        return page
 
     return render_template(
-        "index.html", query=query, response=response, graph_div=graph_div
+        "index.html", query=query, response=response, graph_div=kb_cache.graph_div
+    )
+
+
+@app.route("/api/answer", methods=["GET"])
+def api_answer():
+    """Top-k knowledge base answers for ?q=... with their BM25 scores"""
+    query = request.args.get("q", "")
+    k = min(max(1, request.args.get("k", 5, type=int)), 100)
+    kb_cache.refresh()
+    results = kb_cache.search_index.search(query, k=k)
+    return jsonify(
+        {
+            "query": query,
+            "answers": [
+                {"key": key, "answer": value, "score": score}
+                for key, value, score in results
+            ],
+        }
     )
 
 
@@ -944,28 +809,13 @@ def extract_entities():
         input_text = request.form.get("text", "")
         if input_text:
             try:
-                # Extract entities
-                entities = extract_entities_from_text(input_text)
-
-                # Create graph from entities
-                G = create_graph_from_entities(entities, input_text)
-                graph_div = generate_dynamic_graph_visualization(G)
+                # Entities, graph and layout (shared with the figure), cached by content
+                result = extraction_jobs.run(input_text)
+                entities, G, pos = result["entities"], result["graph"], result["pos"]
+                graph_div = generate_dynamic_graph_visualization(G, pos)
 
                 # Prepare graph data for JavaScript (fix JSON serialization)
                 if len(G.nodes()) > 0:
-                    pos = nx.spring_layout(G, k=4, iterations=100, seed=42)
-                    color_map = {
-                        "PERSON": "#FF6B6B",
-                        "ORG": "#4ECDC4",
-                        "GPE": "#45B7D1",
-                        "PRODUCT": "#96CEB4",
-                        "person": "#FF6B6B",
-                        "organization": "#4ECDC4",
-                        "location": "#45B7D1",
-                        "product": "#96CEB4",
-                        "company": "#4ECDC4",
-                    }
-
                     graph_data = {
                         "nodes": list(G.nodes()),
                         "edges": list(G.edges()),
@@ -973,7 +823,7 @@ def extract_entities():
                             node: list(G.neighbors(node)) for node in G.nodes()
                         },
                         "originalColors": [
-                            color_map.get(
+                            GRAPH_COLORS.get(
                                 G.nodes[node].get("type", "unknown"), "#CCCCCC"
                             )
                             for node in G.nodes()
@@ -1009,70 +859,245 @@ def extract_entities():
     )
 
 
+def wants_compact_graph():
+    """Compact payload via ?format=compact or an explicit Accept header"""
+    if request.args.get("format") == "compact":
+        return True
+    return any(mimetype == COMPACT_MIMETYPE for mimetype, _ in request.accept_mimetypes)
+
+
+def compact_response(payload):
+    """orjson-encoded body, brotli/gzip compressed when the client accepts it"""
+    body = dumps(payload)
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = choose_encoding(request.accept_encodings)
+    response = Response(encode_body(body, encoding), mimetype=COMPACT_MIMETYPE)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    return response
+
+
+def graph_json(G, pos):
+    """Graph data for the React client: nodes, edges, colours and positions"""
+    if len(G.nodes()) == 0:
+        return {
+            "nodes": [],
+            "edges": [],
+            "adjacency": {},
+            "originalColors": [],
+            "positions": {},
+            "nodeTypes": {},
+        }
+
+    return {
+        "nodes": list(G.nodes()),  # Just return node names as strings
+        "edges": list(G.edges()),  # Return edges as tuples
+        "adjacency": {node: list(G.neighbors(node)) for node in G.nodes()},
+        "originalColors": [
+            GRAPH_COLORS.get(G.nodes[node].get("type", "unknown"), "#CCCCCC")
+            for node in G.nodes()
+        ],
+        "positions": {
+            node: [float(pos[node][0]), float(pos[node][1])] for node in G.nodes()
+        },
+        # Add node types separately for React component
+        "nodeTypes": {node: G.nodes[node].get("type", "unknown") for node in G.nodes()},
+    }
+
+
+def extraction_payload(result):
+    """/api/extract response body, in the compact or the default JSON format"""
+    if wants_compact_graph():
+        # Compact wire format: integer-indexed nodes, typed-array positions
+        return compact_response(
+            {
+                "format": "compact-v1",
+                "entities": result["entities"],
+                "graph": compact_graph(result["graph"], result["pos"], GRAPH_COLORS),
+            }
+        )
+    return jsonify(
+        {
+            "entities": result["entities"],
+            "graph": graph_json(result["graph"], result["pos"]),
+        }
+    )
+
+
+def queue_full(error):
+    """429 with Retry-After when the extraction queue is at capacity"""
+    response = jsonify({"error": str(error)})
+    response.status_code = 429
+    response.headers["Retry-After"] = "5"
+    return response
+
+
+def job_status(job, status_code=200):
+    info = job.to_dict()
+    info["status_url"] = f"/api/jobs/{job.id}"
+    response = jsonify(info)
+    response.status_code = status_code
+    if status_code == 202:
+        response.headers["Location"] = info["status_url"]
+    return response
+
+
 @app.route("/api/extract", methods=["POST"])
 def api_extract_entities():
-    """API endpoint to extract entities from text"""
+    """
+    API endpoint to extract entities from text. With {"async": true} the
+    text is queued as a job and the response is 202 with its job id.
+    """
     try:
         data = request.get_json()
 
         if not data or "text" not in data:
             return jsonify({"error": "No text provided"}), 400
 
-        text = data["text"]
-        entities = extract_entities_from_text(text)
-
-        # Create graph from entities
-        G = create_graph_from_entities(entities, text)
-
-        # Convert graph to JSON format (fix numpy array serialization)
-        if len(G.nodes()) > 0:
-            pos = nx.spring_layout(G, k=4, iterations=100, seed=42)
-
-            color_map = {
-                "PERSON": "#FF6B6B",
-                "ORG": "#4ECDC4",
-                "GPE": "#45B7D1",
-                "PRODUCT": "#96CEB4",
-                "person": "#FF6B6B",
-                "organization": "#4ECDC4",
-                "location": "#45B7D1",
-                "product": "#96CEB4",
-                "company": "#4ECDC4",
-            }
-
-            graph_data = {
-                "nodes": list(G.nodes()),  # Just return node names as strings
-                "edges": list(G.edges()),  # Return edges as tuples
-                "adjacency": {node: list(G.neighbors(node)) for node in G.nodes()},
-                "originalColors": [
-                    color_map.get(G.nodes[node].get("type", "unknown"), "#CCCCCC")
-                    for node in G.nodes()
-                ],
-                "positions": {
-                    node: [float(pos[node][0]), float(pos[node][1])]
-                    for node in G.nodes()
-                },
-                # Add node types separately for React component
-                "nodeTypes": {
-                    node: G.nodes[node].get("type", "unknown") for node in G.nodes()
-                },
-            }
-        else:
-            graph_data = {
-                "nodes": [],
-                "edges": [],
-                "adjacency": {},
-                "originalColors": [],
-                "positions": {},
-                "nodeTypes": {},
-            }
+        if data.get("async"):
+            try:
+                job = extraction_jobs.submit(data["text"])
+            except QueueFull as e:
+                return queue_full(e)
+            return job_status(job, 200 if job.done else 202)
 
-        return jsonify({"entities": entities, "graph": graph_data})
+        return extraction_payload(extraction_jobs.run(data["text"]))
 
     except Exception as e:
         print(f"API error: {e}")  # Debug logging
         return jsonify({"error": f"Processing error: {str(e)}"}), 500
 
 
+@app.route("/api/jobs", methods=["POST"])
+def api_submit_job():
+    """Queue {"text": ...} for extraction; 202 with the job id (200 if cached)"""
+    data = request.get_json(silent=True)
+    if not data or "text" not in data:
+        return jsonify({"error": "No text provided"}), 400
+    try:
+        job = extraction_jobs.submit(data["text"])
+    except QueueFull as e:
+        return queue_full(e)
+    return job_status(job, 200 if job.done else 202)
+
+
+@app.route("/api/jobs/stats", methods=["GET"])
+def api_job_stats():
+    return jsonify(extraction_jobs.stats())
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job(job_id):
+    """
+    Job status; once done, the same body as /api/extract (compact format
+    supported). ?wait=N long-polls for up to N seconds (max 30).
+    """
+    job = extraction_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    wait = min(max(0.0, request.args.get("wait", 0.0, type=float)), 30.0)
+    if wait:
+        job.wait(wait)
+
+    if not job.done:
+        return job_status(job, 202)
+    if job.status == FAILED:
+        return jsonify(job.to_dict()), 500
+    return extraction_payload(job.result)
+
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def api_job_events(job_id):
+    """Server-sent events: "status" while the job runs, then "result" or "error"."""
+    job = extraction_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    def generate():
+        while not job.wait(5):
+            yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+        if job.status == FAILED:
+            yield f"event: error\ndata: {json.dumps(job.to_dict())}\n\n"
+            return
+        result = job.result
+        payload = {
+            **job.to_dict(),
+            "entities": result["entities"],
+            "graph": graph_json(result["graph"], result["pos"]),
+        }
+        yield f"event: result\ndata: {json.dumps(payload)}\n\n"
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _iter_ndjson_documents(stream):
+    """Documents from an NDJSON body: one {"id", "text"} object or string per line"""
+    for number, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        if isinstance(item, str):
+            yield number, item
+        else:
+            yield item.get("id", number), item.get("text", "")
+
+
+@app.route("/api/extract/batch", methods=["POST"])
+def api_extract_batch():
+    """
+    Batch entity extraction. Accepts either JSON {"texts": [...]} /
+    {"documents": [{"id", "text"}, ...]} or an NDJSON body
+    (Content-Type: application/x-ndjson), and streams one NDJSON line per
+    document back: {"id": ..., "entities": {...}}.
+
+    Query parameters: batch_size (default 64), n_process (default 1).
+    """
+    batch_size = max(1, request.args.get("batch_size", 64, type=int))
+    n_process = min(
+        max(1, request.args.get("n_process", 1, type=int)), os.cpu_count() or 1
+    )
+
+    if request.mimetype == "application/x-ndjson":
+        documents = _iter_ndjson_documents(request.stream)
+    else:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Expected a JSON object"}), 400
+        if "documents" in data:
+            docs = data["documents"]
+            if not isinstance(docs, list) or not all(isinstance(doc, dict) for doc in docs):
+                return jsonify({"error": "'documents' must be a list of objects"}), 400
+            documents = ((doc.get("id", i), doc.get("text", "")) for i, doc in enumerate(docs))
+        elif "texts" in data:
+            if not isinstance(data["texts"], list):
+                return jsonify({"error": "'texts' must be a list"}), 400
+            documents = enumerate(data["texts"])
+        else:
+            return jsonify({"error": "No texts provided"}), 400
+        try:
+            batch_size = max(1, int(data.get("batch_size", batch_size)))
+            n_process = min(max(1, int(data.get("n_process", n_process))), os.cpu_count() or 1)
+        except (TypeError, ValueError):
+            return jsonify({"error": "batch_size and n_process must be integers"}), 400
+
+    def generate():
+        try:
+            for doc_id, entities in extract_entities_batch(
+                documents, batch_size=batch_size, n_process=n_process
+            ):
+                yield json.dumps({"id": doc_id, "entities": entities}) + "\n"
+        except Exception as e:
+            print(f"Batch API error: {e}")  # Debug logging
+            yield json.dumps({"error": f"Processing error: {str(e)}"}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,168 @@
+"""
+Throughput of the spaCy-less entity extraction: the previous inline version
+from app.py against fallback_ner.py, plus a check that both give the same
+entities on the demo inputs.
+
+    python benchmark_fallback_ner.py
+"""
+import random
+import re
+import time
+
+from fallback_ner import extract_entities
+
+DEMO_INPUTS = [
+    "Elon Musk founded SpaceX in 2002. The company is based in California and "
+    "develops advanced rockets. Tesla was also founded by Elon Musk and produces "
+    "electric vehicles.\n\nBellamy is brother of Octavia. They both live in the "
+    "space station.",
+    "Bill Gates founded Microsoft. Steve Jobs co-founded Apple in California.",
+    "Jeff Bezos started Amazon in Seattle. Mark Zuckerberg created Facebook.",
+    "Clarke is a friend of Raven. Monty and Jasper work for Acme Technologies in London.",
+    "",
+]
+
+
+# The spaCy-less branch of extract_entities_from_text in app.py before bef097d
+def legacy_extract_entities(text):
+    entities = {"PERSON": [], "ORG": [], "GPE": [], "PRODUCT": []}
+
+    # Single name pattern (for names like "Bellamy", "Octavia")
+    single_name_pattern = r"\b[A-Z][a-z]{2,}\b"
+
+    # Full name pattern (for names like "John Smith")
+    full_name_pattern = r"\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b"
+
+    # Find full names first
+    full_names = re.findall(full_name_pattern, text)
+    entities["PERSON"].extend(
+        [name for name in full_names if len(name.split()) <= 3]
+    )
+
+    # Find single names that are not part of organizations
+    single_names = re.findall(single_name_pattern, text)
+
+    # Filter out common words and organization indicators
+    common_words = {
+        "The",
+        "This",
+        "That",
+        "Inc",
+        "Corp",
+        "Ltd",
+        "LLC",
+        "Company",
+        "Technologies",
+        "Systems",
+        "Group",
+        "Industries",
+        "Apple",
+        "Microsoft",
+        "Google",
+        "Amazon",
+        "Facebook",
+        "Tesla",
+        "SpaceX",
+    }
+
+    # Add single names that are likely person names
+    for name in single_names:
+        if (
+            name not in common_words
+            and name not in [n.split()[0] for n in entities["PERSON"]]
+            and name not in [n.split()[-1] for n in entities["PERSON"]]
+        ):
+
+            # Check if it's in a person context
+            name_lower = name.lower()
+            person_context_words = [
+                "brother",
+                "sister",
+                "son",
+                "daughter",
+                "father",
+                "mother",
+                "parent",
+                "child",
+                "friend",
+                "colleague",
+            ]
+
+            text_around_name = ""
+            name_pos = text.lower().find(name_lower)
+            if name_pos != -1:
+                start = max(0, name_pos - 50)
+                end = min(len(text), name_pos + len(name) + 50)
+                text_around_name = text[start:end].lower()
+
+            if any(word in text_around_name for word in person_context_words):
+                entities["PERSON"].append(name)
+
+    # Organization patterns
+    org_patterns = [
+        r"\b[A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*(?:\s+(?:Inc|Corp|Ltd|LLC|Company|Technologies|Systems|Group|Industries))\b",
+        r"\b(?:Apple|Microsoft|Google|Amazon|Facebook|Tesla|SpaceX|Netflix|Twitter|Meta)\b",
+    ]
+
+    for pattern in org_patterns:
+        orgs = re.findall(pattern, text, re.IGNORECASE)
+        entities["ORG"].extend(orgs)
+
+    # Location pattern
+    location_pattern = r"\b(?:California|New York|Texas|London|Paris|Tokyo|Berlin|Sydney|Toronto|Singapore|USA|UK|Canada|Australia)\b"
+    locations = re.findall(location_pattern, text, re.IGNORECASE)
+    entities["GPE"].extend(locations)
+
+    # Remove duplicates
+    for key in entities:
+        entities[key] = list(set(entities[key]))
+
+    return entities
+
+
+def same_entities(a, b):
+    return {k: sorted(v) for k, v in a.items()} == {k: sorted(v) for k, v in b.items()}
+
+
+def synthetic_text(size_bytes, rng):
+    """Demo sentences shuffled together with extra names until `size_bytes`."""
+    names = ["Octavia", "Bellamy", "Clarke", "Raven", "Monty", "Jasper", "Lincoln"]
+    sentences = [s for text in DEMO_INPUTS for s in re.split(r"(?<=[.!?])\s+", text) if s]
+    sentences += [f"{a} is the sister of {b}." for a in names for b in names if a != b]
+    parts, size = [], 0
+    while size < size_bytes:
+        sentence = rng.choice(sentences)
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)
+
+
+def throughput(fn, text, min_time=0.5):
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return runs * len(text.encode()) / elapsed / 1e6
+
+
+def main():
+    for text in DEMO_INPUTS:
+        assert same_entities(legacy_extract_entities(text), extract_entities(text)), text
+    print(f"Demo inputs: identical results on {len(DEMO_INPUTS)} texts")
+
+    rng = random.Random(42)
+    print(f"{'size':>10}{'previous':>14}{'precompiled':>14}{'same':>6}")
+    for size in (10_000, 100_000, 1_000_000):
+        text = synthetic_text(size, rng)
+        same = same_entities(legacy_extract_entities(text), extract_entities(text))
+        old = throughput(legacy_extract_entities, text)
+        new = throughput(extract_entities, text)
+        print(
+            f"{size // 1000:>8}KB{old:>10.2f}MB/s{new:>10.2f}MB/s{'yes' if same else 'NO':>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Compare the previous per-pair regex relationship scan and word-proximity
+check with the single-pass versions in relations.py on synthetic documents
+of growing length.
+
+    python benchmark_relations.py
+"""
+import random
+import re
+import time
+
+from relations import FOUNDING_WORDS, WORK_WORDS, extract_relations, proximity_pairs
+
+FIRST = ["Alice", "Bruno", "Chen", "Dana", "Emil", "Farah", "Goran", "Hana", "Ivan", "Jun"]
+LAST = ["Ivanova", "Petrov", "Garcia", "Kim", "Novak", "Haddad", "Smith", "Tanaka"]
+ORGS = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay Industries",
+        "Stark Industries", "Wayne Enterprises", "Cyberdyne Systems", "Soylent"]
+FILLER = ["the", "company", "in", "later", "with", "a", "new", "team", "and", "market"]
+
+# Entity names that span a line break: only the end of the first name, the
+# trigger and the start of the second have to share a line
+EDGE_CASES = [
+    ("Profile: Bill Gates\nJones founded Microsoft in 1975.", ["Bill Gates\nJones"], ["Microsoft"]),
+    ("Microsoft was founded by Bill\nGates.", ["Bill\nGates"], ["Microsoft"]),
+    ("Ada Lovelace works at Analytical\nEngines Ltd", ["Ada Lovelace"], ["Analytical\nEngines Ltd"]),
+    ("Ada Lovelace works\nat Analytical Engines", ["Ada Lovelace"], ["Analytical Engines"]),
+]
+
+
+# create_graph_from_entities' relationship loops in app.py before 8c0e22b
+def regex_relations(text, persons, orgs):
+    text_lower = text.lower()
+    founded, works_at = set(), set()
+    for person in persons:
+        for org in orgs:
+            person_lower, org_lower = person.lower(), org.lower()
+            if person_lower in text_lower and org_lower in text_lower:
+                for word in FOUNDING_WORDS:
+                    pattern = f"{re.escape(person_lower)}.*{word}.*{re.escape(org_lower)}|{re.escape(org_lower)}.*{word}.*{re.escape(person_lower)}"
+                    if re.search(pattern, text_lower):
+                        founded.add((person, org))
+                        break
+    for person in persons:
+        for org in orgs:
+            person_lower, org_lower = person.lower(), org.lower()
+            if person_lower in text_lower and org_lower in text_lower:
+                for word in WORK_WORDS:
+                    pattern = f"{re.escape(person_lower)}.*{word}.*{re.escape(org_lower)}"
+                    if re.search(pattern, text_lower):
+                        works_at.add((person, org))
+                        break
+    return founded, works_at
+
+
+# The proximity fallback in app.py before 98eb0f0; rescans every word for every pair
+def scan_proximity(text, names, window=5):
+    pairs = []
+    for i, entity1 in enumerate(names):
+        for j in range(i + 1, len(names)):
+            entity2 = names[j]
+            text_words = text.lower().split()
+            positions1 = [
+                k
+                for k, word in enumerate(text_words)
+                if entity1.lower() in word
+                or any(part in word for part in entity1.lower().split())
+            ]
+            positions2 = [
+                k
+                for k, word in enumerate(text_words)
+                if entity2.lower() in word
+                or any(part in word for part in entity2.lower().split())
+            ]
+            if any(abs(p1 - p2) <= window for p1 in positions1 for p2 in positions2):
+                pairs.append((i, j))
+    return pairs
+
+
+def synthetic_document(n_sentences, rng):
+    persons = [f"{f} {l}" for f in FIRST for l in LAST]
+    lines = []
+    for i in range(n_sentences):
+        person, org = rng.choice(persons), rng.choice(ORGS)
+        verb = rng.choice(FOUNDING_WORDS + WORK_WORDS + ["visited", "met"])
+        words = rng.sample(FILLER, 4)
+        if rng.random() < 0.5:
+            sentence = f"{person} {verb} {org} {' '.join(words)}."
+        else:
+            sentence = f"{org} {' '.join(words)} {verb} by {person}."
+        lines.append(sentence)
+    # A few sentences per line, like pasted paragraphs
+    text = "\n".join(" ".join(lines[i : i + 5]) for i in range(0, len(lines), 5))
+    return text, persons, ORGS
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rng = random.Random(42)
+    same = all(
+        extract_relations(*case) == regex_relations(*case) for case in EDGE_CASES
+    )
+    print(f"Names spanning lines: {'same as regex' if same else 'DIFFERENT FROM REGEX'}")
+
+    print("Relationship extraction (founded / works_at)")
+    print(f"{'sentences':>10}{'KB':>8}{'regex':>12}{'single pass':>14}{'same':>6}")
+    for n in (50, 200, 1000, 5000, 20000):
+        text, persons, orgs = synthetic_document(n, rng)
+        if n <= 1000:
+            regex_time, expected = timed(regex_relations, text, persons, orgs)
+            regex_col = f"{regex_time:>10.3f}s"
+        else:
+            expected, regex_col = None, f"{'skipped':>11}"
+        fast_time, result = timed(extract_relations, text, persons, orgs)
+        same = "-" if expected is None else ("yes" if result == expected else "NO")
+        print(f"{n:>10}{len(text) / 1024:>8.0f}{regex_col}{fast_time:>12.3f}s{same:>6}")
+
+    print("\nProximity fallback (within 5 words)")
+    print(f"{'sentences':>10}{'KB':>8}{'rescan':>12}{'index':>14}{'same':>6}")
+    for n in (20, 100, 1000, 20000):
+        text, persons, orgs = synthetic_document(n, rng)
+        names = persons + orgs
+        if n <= 100:
+            scan_time, expected = timed(scan_proximity, text, names)
+            scan_col = f"{scan_time:>10.3f}s"
+        else:
+            expected, scan_col = None, f"{'skipped':>11}"
+        fast_time, result = timed(proximity_pairs, text, names)
+        same = "-" if expected is None else ("yes" if result == expected else "NO")
+        print(f"{n:>10}{len(text) / 1024:>8.0f}{scan_col}{fast_time:>12.3f}s{same:>6}")
+
+
+if __name__ == "__main__":
+    main()
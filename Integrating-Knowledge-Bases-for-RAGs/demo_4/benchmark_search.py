@@ -0,0 +1,95 @@
+"""
+Query latency of KnowledgeSearchIndex against the previous substring scan
+in find_answer, on a synthetic knowledge base.
+
+    python benchmark_search.py --entries 1000000
+"""
+import argparse
+import random
+import time
+
+from kb_search import KnowledgeSearchIndex
+
+FIRST = ["Ada", "Boris", "Chloe", "Dmitri", "Elena", "Felix", "Greta", "Hugo", "Iris", "Jonas"]
+SECTORS = ["search", "retail", "aerospace", "social media", "electric vehicles",
+           "semiconductors", "streaming", "banking", "logistics", "biotech"]
+
+
+# find_answer in app.py before cf1a053
+def substring_answer(query, knowledge_base):
+    query_lower = query.lower()
+    for key, value in knowledge_base.items():
+        if any(word in key.lower() for word in query_lower.split()):
+            return value
+    return None
+
+
+def synthetic_kb(n, seed=42):
+    rng = random.Random(seed)
+    kb = {}
+    for i in range(n):
+        person = f"{rng.choice(FIRST)} Founder{i}"
+        company = f"Company{i}"
+        sector = rng.choice(SECTORS)
+        kb[f"{person} founded {company}"] = (
+            f"{person} is the founder of {company}, a {sector} company."
+        )
+    return kb
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    kb = synthetic_kb(args.entries)
+    start = time.perf_counter()
+    index = KnowledgeSearchIndex(kb)
+    print(
+        f"{len(kb):,} entries, {len(index.vocabulary):,} terms, "
+        f"index built in {time.perf_counter() - start:.1f}s"
+    )
+
+    rng = random.Random(0)
+    ids = [rng.randrange(args.entries) for _ in range(args.queries)]
+    workloads = {
+        "who founded CompanyN": [f"Who founded Company{i}?" for i in ids],
+        "what did FounderN found": [f"What did Founder{i} found?" for i in ids],
+        "common words": [f"{rng.choice(SECTORS)} company founder" for _ in ids],
+    }
+
+    # "hit": the entry about the queried company/founder is returned
+    # (for the scan: as its single answer; for the index: within the top 5)
+    header = f"{'query':<26}{'scan':>12}{'scan hit':>10}{'index p50':>12}{'index p99':>12}{'hit':>6}"
+    print(header)
+    for label, queries in workloads.items():
+        scan_n, scan_hits = 5, 0
+        start = time.perf_counter()
+        for q, i in zip(queries[:scan_n], ids):
+            answer = substring_answer(q, kb) or ""
+            scan_hits += f"Company{i}," in answer
+        scan = (time.perf_counter() - start) / scan_n
+
+        latencies, hits = [], 0
+        for q, i in zip(queries, ids):
+            start = time.perf_counter()
+            results = index.search(q, k=5)
+            latencies.append(time.perf_counter() - start)
+            hits += any(key.endswith(f"Company{i}") for key, _, _ in results)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        if label == "common words":
+            hit = scan_hit = "-"
+        else:
+            hit = f"{hits / len(queries):.0%}"
+            scan_hit = f"{scan_hits / scan_n:.0%}"
+        print(
+            f"{label:<26}{scan * 1e3:>10.2f}ms{scan_hit:>10}"
+            f"{p50 * 1e3:>10.3f}ms{p99 * 1e3:>10.3f}ms{hit:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Background extraction jobs with a content-addressed result cache.
+
+submit(text) returns a Job immediately. The work runs on a bounded thread
+pool, and the result is stored under the SHA-256 of the text:
+
+- a text already in the cache gives a job that is done on creation;
+- a text that is already being processed shares the running job;
+- the cache keeps the CACHE_SIZE most recently used results (LRU).
+
+At most MAX_PENDING texts are queued or running at once; submit() raises
+QueueFull beyond that instead of growing the pool's queue without bound.
+run() (the synchronous endpoints) shares the cache but computes on the
+caller's thread, so it never waits behind queued jobs.
+
+Finished jobs are forgotten after JOB_TTL seconds, or sooner once more than
+MAX_JOBS are held; the cached result itself outlives them.
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+CACHE_SIZE = int(os.environ.get("EXTRACT_CACHE_SIZE", 256))
+MAX_PENDING = int(os.environ.get("EXTRACT_MAX_PENDING", 64))
+MAX_JOBS = 1000
+JOB_TTL = 600
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    """Raised by submit() when MAX_PENDING jobs are already queued or running."""
+
+
+def content_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.created = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    def _finish(self, status, result=None, error=None):
+        self.status, self.result, self.error = status, result, error
+        self.finished = time.time()
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Block until the job is finished; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def to_dict(self):
+        info = {"job_id": self.id, "status": self.status, "cached": self.cached}
+        if self.error:
+            info["error"] = self.error
+        if self.finished:
+            info["elapsed"] = round(self.finished - self.created, 4)
+        return info
+
+
+class JobManager:
+    def __init__(self, work, max_workers=MAX_WORKERS, cache_size=CACHE_SIZE,
+                 max_pending=MAX_PENDING):
+        self.work = work
+        self.cache_size = cache_size
+        self.max_pending = max_pending
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="extract"
+        )
+        self._results = OrderedDict()  # content key -> result
+        self._jobs = OrderedDict()  # job id -> Job
+        self._running = {}  # content key -> Job in progress
+        self._lock = threading.Lock()
+
+    # --- result cache ---
+
+    def _store(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    # --- jobs ---
+
+    def submit(self, text):
+        key = content_key(text)
+        with self._lock:
+            self._expire()
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                job = Job(key)
+                job.cached = True
+                job._finish(DONE, self._results[key])
+                self._jobs[job.id] = job
+                return job
+            if key in self._running:
+                # Same document already in flight: share its job
+                self.hits += 1
+                return self._running[key]
+            if len(self._running) >= self.max_pending:
+                raise QueueFull(f"{len(self._running)} extraction jobs already pending")
+            self.misses += 1
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._running[key] = job
+        self._executor.submit(self._run, job, text)
+        return job
+
+    def run(self, text):
+        """
+        Synchronous path through the same cache (used by the inline
+        endpoints). The work runs on the calling thread, not on the pool.
+        """
+        key = content_key(text)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            job = self._running.get(key)
+            if job is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if job is not None:
+            # Same document already in flight: wait for it rather than redo it
+            job.wait()
+            if job.status == FAILED:
+                raise RuntimeError(job.error)
+            return job.result
+        result = self.work(text)
+        self._store(key, result)
+        return result
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, text):
+        job.status = RUNNING
+        try:
+            result = self.work(text)
+        except Exception as e:
+            print(f"Extraction job {job.id} failed: {e}")  # Debug logging
+            job._finish(FAILED, error=str(e))
+        else:
+            self._store(job.key, result)
+            job._finish(DONE, result)
+        finally:
+            with self._lock:
+                self._running.pop(job.key, None)
+
+    def _expire(self):
+        """Drop finished jobs past JOB_TTL, then the oldest beyond MAX_JOBS."""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - job.finished > JOB_TTL:
+                del self._jobs[job_id]
+        while len(self._jobs) > MAX_JOBS:
+            job_id = next((i for i, job in self._jobs.items() if job.done), None)
+            if job_id is None:
+                break
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached_results": len(self._results),
+                "cache_size": self.cache_size,
+                "jobs": len(self._jobs),
+                "running": len(self._running),
+                "max_pending": self.max_pending,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,103 @@
+"""
+Pattern-based entity extraction, used by extract_entities_from_text when
+spaCy is not installed.
+
+All patterns are compiled once at import. Name filtering uses sets that are
+updated as names are accepted (instead of rebuilding lists of first/last
+names per candidate), the person-context check is a single compiled search
+over a window of the text and is done once per distinct name, and the
+organisation-name and location keyword lists are matched in one combined
+scan.
+"""
+import re
+
+# Single name pattern (for names like "Bellamy", "Octavia")
+SINGLE_NAME_RE = re.compile(r"\b[A-Z][a-z]{2,}\b")
+
+# Full name pattern (for names like "John Smith")
+FULL_NAME_RE = re.compile(r"\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b")
+
+# Capitalised words followed by a company suffix
+ORG_SUFFIX_RE = re.compile(
+    r"\b[A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*(?:\s+(?:Inc|Corp|Ltd|LLC|Company|Technologies|Systems|Group|Industries))\b",
+    re.IGNORECASE,
+)
+
+# Known organisations and locations; the two lists share no words, so one
+# scan finds exactly what two separate findall calls would
+KEYWORD_RE = re.compile(
+    r"\b(?:(?P<ORG>Apple|Microsoft|Google|Amazon|Facebook|Tesla|SpaceX|Netflix|Twitter|Meta)"
+    r"|(?P<GPE>California|New York|Texas|London|Paris|Tokyo|Berlin|Sydney|Toronto|Singapore|USA|UK|Canada|Australia))\b",
+    re.IGNORECASE,
+)
+
+# Words that are capitalised but are not person names
+COMMON_WORDS = frozenset(
+    {
+        "The",
+        "This",
+        "That",
+        "Inc",
+        "Corp",
+        "Ltd",
+        "LLC",
+        "Company",
+        "Technologies",
+        "Systems",
+        "Group",
+        "Industries",
+        "Apple",
+        "Microsoft",
+        "Google",
+        "Amazon",
+        "Facebook",
+        "Tesla",
+        "SpaceX",
+    }
+)
+
+# A single name counts as a person if one of these occurs near it
+PERSON_CONTEXT_RE = re.compile(
+    "brother|sister|son|daughter|father|mother|parent|child|friend|colleague"
+)
+CONTEXT_CHARS = 50
+
+
+def extract_entities(text):
+    """Return {"PERSON", "ORG", "GPE", "PRODUCT"} -> list of unique names."""
+    persons = [name for name in FULL_NAME_RE.findall(text) if len(name.split()) <= 3]
+    first_names = {name.split()[0] for name in persons}
+    last_names = {name.split()[-1] for name in persons}
+
+    text_lower = text.lower()
+    in_person_context = {}  # name -> bool, the check only depends on the name
+    for name in SINGLE_NAME_RE.findall(text):
+        if name in COMMON_WORDS or name in first_names or name in last_names:
+            continue
+
+        if name not in in_person_context:
+            # Look around the first occurrence of the name
+            name_pos = text_lower.find(name.lower())
+            found = False
+            if name_pos != -1:
+                start = max(0, name_pos - CONTEXT_CHARS)
+                end = min(len(text), name_pos + len(name) + CONTEXT_CHARS)
+                found = PERSON_CONTEXT_RE.search(text_lower, start, end) is not None
+            in_person_context[name] = found
+
+        if in_person_context[name]:
+            persons.append(name)
+            first_names.add(name)
+            last_names.add(name)
+
+    orgs = ORG_SUFFIX_RE.findall(text)
+    locations = []
+    for match in KEYWORD_RE.finditer(text):
+        (orgs if match.lastgroup == "ORG" else locations).append(match.group())
+
+    return {
+        "PERSON": list(set(persons)),
+        "ORG": list(set(orgs)),
+        "GPE": list(set(locations)),
+        "PRODUCT": [],
+    }
@@ -0,0 +1,104 @@
+"""
+Ranked question answering over the knowledge base.
+
+Each entry (key + value) is tokenised once, stop words are dropped, and the
+BM25 weight of every (term, entry) pair is stored in a sparse term-major
+matrix. A query only touches the postings of its own terms, so the cost does
+not grow with the number of entries. Key terms count double, since the key
+("Bill Gates founded Microsoft") is the most specific text of an entry.
+
+Postings are kept in impact order (highest weight first). When the query's
+terms have more than MAX_POSTINGS postings in total, each term only
+contributes its highest-impact entries. That keeps very common terms from
+scanning the whole index, at the cost of exact scores for low-ranked entries.
+"""
+import re
+from array import array
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a about an and are as at be by can could did do does for from had has have
+    how i in is it its me my of on or tell that the their them there these they
+    this to was were what when where which who whom why will with you your
+    """.split()
+)
+
+KEY_WEIGHT = 2
+MAX_POSTINGS = 20_000
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class KnowledgeSearchIndex:
+    def __init__(self, knowledge_base, k1=1.5, b=0.75):
+        self.keys = list(knowledge_base)
+        self.values = [knowledge_base[key] for key in self.keys]
+        self.vocabulary = {}
+
+        rows, cols, counts = array("i"), array("i"), array("f")
+        lengths = np.zeros(len(self.keys), dtype=np.float32)
+        for doc, key in enumerate(self.keys):
+            tf = {}
+            for token in tokenize(key):
+                tf[token] = tf.get(token, 0) + KEY_WEIGHT
+            for token in tokenize(self.values[doc]):
+                tf[token] = tf.get(token, 0) + 1
+            for token, count in tf.items():
+                term = self.vocabulary.setdefault(token, len(self.vocabulary))
+                rows.append(term)
+                cols.append(doc)
+                counts.append(count)
+            lengths[doc] = sum(tf.values())
+
+        n_docs, n_terms = len(self.keys), len(self.vocabulary)
+        rows = np.frombuffer(rows, dtype=np.int32)
+        cols = np.frombuffer(cols, dtype=np.int32)
+        tf = np.frombuffer(counts, dtype=np.float32)
+
+        # BM25 weight per (term, entry)
+        df = np.bincount(rows, minlength=n_terms).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avgdl = lengths.mean() if n_docs else 1.0
+        norm = k1 * (1 - b + b * lengths[cols] / avgdl)
+        weights = idf[rows] * tf * (k1 + 1) / (tf + norm)
+
+        # Term-major postings, each term's entries sorted by descending weight
+        order = np.lexsort((-weights, rows))
+        self.postings_doc = cols[order]
+        self.postings_weight = weights[order].astype(np.float32)
+        self.postings_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=self.postings_ptr[1:])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query, k=5):
+        """Top-k entries for `query` as [(key, value, score)], best first."""
+        terms = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not terms:
+            return []
+
+        spans = [(self.postings_ptr[t], self.postings_ptr[t + 1]) for t in terms]
+        total = sum(end - start for start, end in spans)
+        if total > MAX_POSTINGS:
+            budget = max(k, MAX_POSTINGS // len(spans))
+            spans = [(start, min(end, start + budget)) for start, end in spans]
+
+        docs = np.concatenate([self.postings_doc[s:e] for s, e in spans])
+        weights = np.concatenate([self.postings_weight[s:e] for s, e in spans])
+        if len(spans) > 1:
+            docs, inverse = np.unique(docs, return_inverse=True)
+            weights = np.bincount(inverse, weights=weights)
+
+        k = min(k, len(docs))
+        top = np.argpartition(-weights, k - 1)[:k]
+        top = top[np.argsort(-weights[top], kind="stable")]
+        return [
+            (self.keys[docs[i]], self.values[docs[i]], float(weights[i])) for i in top
+        ]
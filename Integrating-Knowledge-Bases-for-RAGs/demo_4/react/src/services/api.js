@@ -4,17 +4,60 @@ const API_BASE_URL = process.env.NODE_ENV === 'development'
   ? 'http://localhost:5000' 
   : '';
 
-export const extractEntities = async (text) => {
+// Expand the compact-v1 graph payload (see wire_format.py) into the
+// verbose shape the components use: node names, [source, target] edges,
+// adjacency, colours, positions and types keyed by node name.
+export const decodeCompactGraph = (graph) => {
+  const { nodes, types, typeNames, palette, edges: flatEdges } = graph;
+
+  const bytes = Uint8Array.from(atob(graph.positions), (c) => c.charCodeAt(0));
+  const coords = new Float32Array(bytes.buffer);
+
+  const edges = [];
+  const adjacency = {};
+  const positions = {};
+  const nodeTypes = {};
+  nodes.forEach((node, i) => {
+    adjacency[node] = [];
+    positions[node] = [coords[2 * i], coords[2 * i + 1]];
+    nodeTypes[node] = typeNames[types[i]];
+  });
+  for (let i = 0; i < flatEdges.length; i += 2) {
+    const source = nodes[flatEdges[i]];
+    const target = nodes[flatEdges[i + 1]];
+    edges.push([source, target]);
+    adjacency[source].push(target);
+    if (source !== target) {
+      adjacency[target].push(source);
+    }
+  }
+
+  return {
+    nodes,
+    edges,
+    adjacency,
+    originalColors: types.map((t) => palette[t]),
+    positions,
+    nodeTypes,
+  };
+};
+
+export const extractEntities = async (text, { compact = true } = {}) => {
   try {
     const response = await axios.post(`${API_BASE_URL}/api/extract`, {
       text: text
     }, {
+      params: compact ? { format: 'compact' } : {},
       headers: {
         'Content-Type': 'application/json',
       }
     });
-    
-    return response.data;
+
+    const data = response.data;
+    if (data.format === 'compact-v1') {
+      return { entities: data.entities, graph: decodeCompactGraph(data.graph) };
+    }
+    return data;
   } catch (error) {
     console.error('API Error:', error);
     throw new Error(error.response?.data?.error || 'Failed to extract entities');
@@ -0,0 +1,226 @@
+"""
+Single-pass relationship extraction for create_graph_from_entities.
+
+All entity surface forms and trigger words go into one Aho-Corasick automaton,
+so the lowercased text is scanned once however many entities there are. The
+relations are then decided from the mention spans:
+
+- founded:  person ... founding word ... org   (or org ... word ... person)
+- works_at: person ... work word ... org
+
+on the same line, which is what the previous `.*` regexes matched (`.` does
+not cross newlines). The names themselves may span lines: what has to share
+a line is the end of the first name, the trigger and the start of the second.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+
+FOUNDING_WORDS = ["founded", "started", "created", "established", "co-founded"]
+WORK_WORDS = ["works at", "ceo of", "president of", "director of", "employed by"]
+
+ENTITY, FOUNDING, WORK = "entity", "founding", "work"
+
+NEWLINE_RE = re.compile("\n")
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; reports every (possibly overlapping) match."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # state -> [(pattern length, value)]
+
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(pattern), value))
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and char not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(char, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def finditer(self, text):
+        """Yield (start, end, value) for every occurrence of every pattern."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                for length, value in out[state]:
+                    yield i + 1 - length, i + 1, value
+
+
+def build_matcher(entity_names):
+    """Automaton over lowercased entity names plus all trigger words."""
+    patterns = [(name.lower(), (ENTITY, name)) for name in entity_names]
+    patterns += [(word, (FOUNDING, word)) for word in FOUNDING_WORDS]
+    patterns += [(word, (WORK, word)) for word in WORK_WORDS]
+    return AhoCorasick(patterns)
+
+
+def find_mentions(text_lower, matcher):
+    """
+    Scan the text once. Returns (mentions, triggers):
+    mentions: entity name -> [(start, end), ...] in text order
+    triggers: kind -> [(start, end), ...] in order of start
+    """
+    mentions = defaultdict(list)
+    triggers = defaultdict(list)
+    for start, end, (kind, name) in matcher.finditer(text_lower):
+        if kind == ENTITY:
+            mentions[name].append((start, end))
+        else:
+            triggers[kind].append((start, end))
+    for spans in triggers.values():
+        spans.sort()
+    return mentions, triggers
+
+
+def _ordered_pairs(first, second, trigger_spans, line_starts):
+    """
+    Pairs (a, b) with a mention of `a`, then a trigger, then a mention of `b`,
+    none overlapping, with a's end, the trigger and b's start on one line.
+
+    first/second: name -> spans. Per line we only need the earliest end of
+    `a` and the latest start of `b`: the pair holds when the first trigger
+    starting after a's earliest end also ends before b's latest start.
+    """
+    pairs = set()
+    if not trigger_spans:
+        return pairs
+
+    def per_line(spans_by_name, pick):
+        table = defaultdict(dict)  # line -> name -> position
+        for name, spans in spans_by_name.items():
+            for start, end in spans:
+                # `a` is placed by its end, `b` by its start: a name may contain a newline
+                pos = end if pick is min else start
+                line = bisect_right(line_starts, pos) - 1
+                current = table[line].get(name)
+                table[line][name] = pos if current is None else pick(current, pos)
+        return table
+
+    first_end = per_line(first, min)
+    second_start = per_line(second, max)
+
+    triggers_by_line = defaultdict(list)
+    for start, end in trigger_spans:
+        triggers_by_line[bisect_right(line_starts, start) - 1].append((start, end))
+
+    for line, a_ends in first_end.items():
+        spans = triggers_by_line.get(line)
+        b_starts = second_start.get(line)
+        if not spans or not b_starts:
+            continue
+        starts = [s for s, _ in spans]
+        # suffix_min_end[i] = smallest trigger end among triggers i.. (by start)
+        suffix_min_end = [0] * len(spans)
+        best = None
+        for i in range(len(spans) - 1, -1, -1):
+            best = spans[i][1] if best is None else min(best, spans[i][1])
+            suffix_min_end[i] = best
+
+        by_start = sorted(b_starts.items(), key=lambda item: item[1])
+        b_positions = [pos for _, pos in by_start]
+        for a, a_end in a_ends.items():
+            i = bisect_left(starts, a_end)
+            if i == len(starts):
+                continue
+            trigger_end = suffix_min_end[i]
+            for b, _ in by_start[bisect_left(b_positions, trigger_end):]:
+                pairs.add((a, b))
+    return pairs
+
+
+def extract_relations(text, persons, orgs, matcher=None):
+    """
+    Return (founded, works_at): sets of (person, org) pairs found in `text`.
+    """
+    text_lower = text.lower()
+    if matcher is None:
+        matcher = build_matcher(list(persons) + list(orgs))
+    mentions, triggers = find_mentions(text_lower, matcher)
+
+    line_starts = [0] + [m.end() for m in NEWLINE_RE.finditer(text_lower)]
+    person_mentions = {p: mentions[p] for p in persons if mentions.get(p)}
+    org_mentions = {o: mentions[o] for o in orgs if mentions.get(o)}
+
+    founded = _ordered_pairs(person_mentions, org_mentions, triggers[FOUNDING], line_starts)
+    founded |= {
+        (p, o)
+        for o, p in _ordered_pairs(org_mentions, person_mentions, triggers[FOUNDING], line_starts)
+    }
+    works_at = _ordered_pairs(person_mentions, org_mentions, triggers[WORK], line_starts)
+    return founded, works_at
+
+
+WORD_RE = re.compile(r"\S+")
+
+
+def mention_positions(text, names):
+    """
+    Positional mention index: for each name, the sorted word positions in
+    `text.lower().split()` where the name or one of its words occurs as a
+    substring of the word.
+    """
+    text_lower = text.lower()
+    word_starts = [m.start() for m in WORD_RE.finditer(text_lower)]
+
+    parts = {part for name in names for part in name.lower().split()}
+    matcher = AhoCorasick((part, part) for part in parts)
+    part_positions = defaultdict(set)
+    for start, _, part in matcher.finditer(text_lower):
+        # Parts contain no whitespace, so a match never spans two words
+        part_positions[part].add(bisect_right(word_starts, start) - 1)
+
+    positions = {}
+    for name in names:
+        found = set()
+        for part in name.lower().split():
+            found |= part_positions.get(part, set())
+        positions[name] = sorted(found)
+    return positions
+
+
+def proximity_pairs(text, names, window=5):
+    """
+    Index pairs (i, j), i < j, of names mentioned within `window` words of
+    each other, in the order the nested loop over `names` would visit them.
+    """
+    positions = mention_positions(text, names)
+    events = sorted(
+        (pos, i) for i, name in enumerate(names) for pos in positions[name]
+    )
+
+    pairs = set()
+    recent = deque()  # events within the last `window` words
+    for pos, i in events:
+        while recent and recent[0][0] < pos - window:
+            recent.popleft()
+        for _, j in recent:
+            if i != j:
+                pairs.add((min(i, j), max(i, j)))
+        recent.append((pos, i))
+    return sorted(pairs)
@@ -0,0 +1,93 @@
+"""
+Compact graph payload for /api/extract.
+
+The default JSON repeats every node name in nodes, adjacency, positions and
+nodeTypes. The compact format (requested with `?format=compact` or
+`Accept: application/vnd.graph.compact+json`) names each node once:
+
+    {
+      "format": "compact-v1",
+      "entities": {...},
+      "graph": {
+        "nodes":     ["Elon Musk", "SpaceX", ...],
+        "types":     [0, 1, ...],                 index into typeNames
+        "typeNames": ["person", "organization"],
+        "palette":   ["#FF6B6B", "#4ECDC4"],      colour per type name
+        "edges":     [0, 1, ...],                 flat pairs of node indices
+        "positions": "<base64>"                   little-endian float32 x0,y0,x1,y1,...
+      }
+    }
+
+Adjacency and colours are derived on the client (react/src/services/api.js).
+Responses are encoded with orjson and compressed with brotli or gzip
+according to Accept-Encoding.
+"""
+import base64
+import gzip
+import sys
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPACT_MIMETYPE = "application/vnd.graph.compact+json"
+COMPRESS_MIN_BYTES = 1024
+
+
+def compact_graph(G, pos, color_map, default_color="#CCCCCC"):
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+
+    type_names, type_index, types = [], {}, []
+    for node in nodes:
+        node_type = G.nodes[node].get("type", "unknown")
+        if node_type not in type_index:
+            type_index[node_type] = len(type_names)
+            type_names.append(node_type)
+        types.append(type_index[node_type])
+
+    edges = [index[n] for edge in G.edges() for n in edge]
+
+    coords = array("f", (float(c) for node in nodes for c in pos[node]))
+    if sys.byteorder == "big":
+        coords.byteswap()
+
+    return {
+        "nodes": nodes,
+        "types": types,
+        "typeNames": type_names,
+        "palette": [color_map.get(t, default_color) for t in type_names],
+        "edges": edges,
+        "positions": base64.b64encode(coords.tobytes()).decode("ascii"),
+    }
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def choose_encoding(accept_encodings):
+    """Pick brotli when the client and server both support it, else gzip."""
+    if brotli is not None and "br" in accept_encodings:
+        return "br"
+    if "gzip" in accept_encodings:
+        return "gzip"
+    return None
+
+
+def encode_body(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
@@ -0,0 +1,88 @@
+"""
+Indexing throughput and query latency of local_retrieval on a large corpus
+built from stories.txt (paragraphs shuffled per copy, so chunks differ).
+
+    python benchmark_retrieval.py --mb 5
+    python benchmark_retrieval.py --model /path/to/local/sentence-transformer
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from local_retrieval import DEFAULT_MODEL, LocalVectorIndex, cached_embeddings, iter_chunks
+
+
+def build_corpus(path, size_mb, seed=42):
+    with open("stories.txt", encoding="utf-8") as f:
+        paragraphs = [p for p in f.read().split("\n\n") if p.strip()]
+    rng = random.Random(seed)
+    written, copy = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size_mb * 1e6:
+            rng.shuffle(paragraphs)
+            text = f"Copy {copy}.\n\n" + "\n\n".join(paragraphs) + "\n\n"
+            f.write(text)
+            written += len(text.encode("utf-8"))
+            copy += 1
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--mb", type=float, default=5)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="retrieval-bench-")
+    try:
+        corpus = os.path.join(work, "corpus.txt")
+        build_corpus(corpus, args.mb)
+        mb = os.path.getsize(corpus) / 1e6
+
+        n_chunks, t = timed(lambda: sum(1 for _ in iter_chunks(corpus)))
+        print(f"Corpus {mb:.1f} MB, {n_chunks} chunks; splitting {mb / t:.1f} MB/s")
+
+        embeddings = cached_embeddings(args.model, cache_dir=os.path.join(work, "cache"))
+
+        def index_into(name):
+            index = LocalVectorIndex(os.path.join(work, name), embeddings)
+            return index, *timed(lambda: index.add_file(corpus))
+
+        index, (added, _), t = index_into("cold")
+        # Identical chunks (repeated paragraphs) are stored once
+        print(f"Unique chunks:     {added}")
+        print(f"Cold index:        {added / t:8.0f} chunks/s  {mb / t:6.2f} MB/s  ({t:.1f}s)")
+
+        _, (added, _), t = index_into("warm")
+        print(f"Embedding cache:   {added / t:8.0f} chunks/s  {mb / t:6.2f} MB/s  ({t:.1f}s)")
+
+        (added, _), t = timed(lambda: index.add_file(corpus))
+        print(f"Unchanged re-add:  {added} chunks added in {t:.2f}s")
+
+        reloaded, t = timed(lambda: LocalVectorIndex(os.path.join(work, "cold"), embeddings))
+        print(f"Load from disk:    {len(reloaded)} vectors in {t:.2f}s")
+
+        rng = random.Random(0)
+        words = open("stories.txt", encoding="utf-8").read().split()
+        queries = [" ".join(rng.sample(words, 6)) for _ in range(args.queries)]
+        reloaded.search(queries[0], k=args.k)  # warm up
+        latencies = sorted(timed(lambda q=q: reloaded.search(q, k=args.k))[1] for q in queries)
+        p50 = latencies[len(latencies) // 2] * 1e3
+        p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+        print(f"Top-{args.k} query:       p50 {p50:.2f} ms  p99 {p99:.2f} ms (incl. query embedding)")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
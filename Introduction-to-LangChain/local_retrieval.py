@@ -0,0 +1,186 @@
+"""
+Local vector retrieval for the LangChain chain notebook.
+
+- iter_chunks() streams a text file in blocks and yields overlapping chunks
+  (cut at paragraph, line, sentence or word boundaries), so a corpus larger
+  than memory can be indexed.
+- cached_embeddings() runs a local sentence-transformers model behind
+  LangChain's CacheBackedEmbeddings. Each chunk's vector is stored on disk
+  under a SHA-256 of its text, so unchanged chunks are never embedded twice.
+- LocalVectorIndex keeps a FAISS index on disk. add_file() only embeds and
+  adds chunks it does not hold yet, and it drops chunks that disappeared
+  from a re-indexed file.
+
+Usage from the notebook:
+
+    index = LocalVectorIndex("faiss_index")
+    index.add_file("stories.txt")
+    retriever = index.as_retriever(k=4)
+
+or from the command line:
+
+    python local_retrieval.py index stories.txt
+    python local_retrieval.py query "Who is Aragorn?"
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+INDEX_DIR = "faiss_index"
+CACHE_DIR = "embedding_cache"
+
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+
+def _cut(text, limit):
+    """Position to end a chunk at: the last separator within `limit` characters."""
+    for separator in SEPARATORS:
+        pos = text.rfind(separator, 0, limit)
+        if pos > limit // 2:
+            return pos + len(separator)
+    return limit
+
+
+def iter_chunks(path, chunk_size=1000, chunk_overlap=200, block_size=1 << 16):
+    """Yield Documents of at most `chunk_size` characters from `path`."""
+    offset = 0  # position of buf[0] in the file
+    buf = ""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(block_size)
+            buf += block
+            # Keep a full chunk in the buffer unless the file is exhausted
+            while len(buf) > chunk_size or (not block and buf):
+                end = _cut(buf, chunk_size) if len(buf) > chunk_size else len(buf)
+                text = buf[:end].strip()
+                if text:
+                    yield Document(
+                        page_content=text,
+                        metadata={"source": path, "start_index": offset},
+                    )
+                if end == len(buf):
+                    buf = ""
+                    break
+                # Start the next chunk `chunk_overlap` characters back, on a word
+                start = max(end - chunk_overlap, 1)
+                space = buf.find(" ", start, end)
+                start = space + 1 if space != -1 else end
+                offset += start
+                buf = buf[start:]
+            if not block:
+                return
+
+
+def cached_embeddings(model_name=DEFAULT_MODEL, cache_dir=CACHE_DIR, batch_size=64):
+    """Sentence-transformers embeddings with an on-disk, content-addressed cache."""
+    underlying = HuggingFaceEmbeddings(
+        model_name=model_name,
+        encode_kwargs={"batch_size": batch_size, "normalize_embeddings": True},
+    )
+    return CacheBackedEmbeddings.from_bytes_store(
+        underlying,
+        LocalFileStore(cache_dir),
+        # One sub-directory per model; vectors of different models never mix
+        namespace=re.sub(r"[^\w.-]+", "_", model_name).strip("_") + "/",
+        batch_size=batch_size * 8,
+        key_encoder="sha256",
+    )
+
+
+def chunk_id(doc):
+    return hashlib.sha256(
+        f"{doc.metadata['source']}\0{doc.page_content}".encode("utf-8")
+    ).hexdigest()
+
+
+class LocalVectorIndex:
+    def __init__(self, index_dir=INDEX_DIR, embeddings=None):
+        self.index_dir = index_dir
+        self.embeddings = embeddings or cached_embeddings()
+        self.vectorstore = None
+        self.sources = {}  # source path -> chunk ids
+        if os.path.exists(os.path.join(index_dir, "index.faiss")):
+            # Our own index, so unpickling its docstore is safe
+            self.vectorstore = FAISS.load_local(
+                index_dir, self.embeddings, allow_dangerous_deserialization=True
+            )
+            with open(os.path.join(index_dir, "sources.json"), encoding="utf-8") as f:
+                self.sources = json.load(f)
+
+    def __len__(self):
+        return self.vectorstore.index.ntotal if self.vectorstore else 0
+
+    def _add(self, docs, ids):
+        if self.vectorstore is None:
+            self.vectorstore = FAISS.from_documents(docs, self.embeddings, ids=ids)
+        else:
+            self.vectorstore.add_documents(docs, ids=ids)
+
+    def add_file(self, path, chunk_size=1000, chunk_overlap=200, batch_size=512, save=True):
+        """Index new chunks of `path`; returns (added, removed) chunk counts."""
+        known = set(self.sources.get(path, []))
+        seen = {}  # chunk ids of this version of the file, in order
+        batch, ids, added = [], [], 0
+        for doc in iter_chunks(path, chunk_size, chunk_overlap):
+            doc_id = chunk_id(doc)
+            if doc_id in seen:
+                continue
+            seen[doc_id] = None
+            if doc_id in known:
+                continue
+            batch.append(doc)
+            ids.append(doc_id)
+            if len(batch) >= batch_size:
+                self._add(batch, ids)
+                added += len(batch)
+                batch, ids = [], []
+        if batch:
+            self._add(batch, ids)
+            added += len(batch)
+
+        stale = known - seen.keys()
+        if stale:
+            self.vectorstore.delete(list(stale))
+        self.sources[path] = list(seen)
+        if save:
+            self.save()
+        return added, len(stale)
+
+    def save(self):
+        if self.vectorstore is None:
+            return
+        self.vectorstore.save_local(self.index_dir)
+        with open(os.path.join(self.index_dir, "sources.json"), "w", encoding="utf-8") as f:
+            json.dump(self.sources, f)
+
+    def search(self, query, k=4):
+        if self.vectorstore is None:
+            return []
+        return self.vectorstore.similarity_search_with_score(query, k=k)
+
+    def as_retriever(self, k=4):
+        if self.vectorstore is None:
+            raise ValueError("The index is empty: add documents before asking for a retriever")
+        return self.vectorstore.as_retriever(search_kwargs={"k": k})
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("index", "query"):
+        sys.exit("usage: python local_retrieval.py index FILE... | query TEXT")
+    index = LocalVectorIndex()
+    if sys.argv[1] == "index":
+        for path in sys.argv[2:]:
+            added, removed = index.add_file(path)
+            print(f"{path}: {added} chunks added, {removed} removed, {len(index)} total")
+    else:
+        for doc, score in index.search(" ".join(sys.argv[2:])):
+            print(f"{score:.3f}  [{doc.metadata['start_index']}] {doc.page_content[:100]!r}")
@@ -7,8 +7,21 @@ import joblib, os, re
 app = FastAPI(title="Income Prediction API")
 
 # --- load model -----------------------------------------------------------
+# MODEL_URI (e.g. models:/IrisSKModel/Production) loads from the MLflow registry
+# through the shared local artifact cache; otherwise use files in the workdir.
+MODEL_URI = os.getenv("MODEL_URI")
 USE_ONNX = os.getenv("USE_ONNX", "1") == "1"
-if USE_ONNX:
+if MODEL_URI:
+    from model_registry import load_model
+
+    kind, model = load_model(MODEL_URI)
+    USE_ONNX = kind == "onnx"
+    if USE_ONNX:
+        sess = model
+        ONNX_INPUTS = [i.name for i in sess.get_inputs()]
+    else:
+        pipe = model
+elif USE_ONNX:
     sess = ort.InferenceSession("LogisticRegression.onnx", providers=["CPUExecutionProvider"])
     ONNX_INPUTS = [i.name for i in sess.get_inputs()]
 else:
@@ -49,9 +62,10 @@ def predict(rec: Record):
         input_dict[onnx_key] = arr
 
     # validate keys → quick guardrail
-    missing = set(ONNX_INPUTS) - input_dict.keys()
-    if missing:
-        raise ValueError(f"Missing keys for ONNX: {missing}")
+    if USE_ONNX:
+        missing = set(ONNX_INPUTS) - input_dict.keys()
+        if missing:
+            raise ValueError(f"Missing keys for ONNX: {missing}")
 
     # run inference
     if USE_ONNX:
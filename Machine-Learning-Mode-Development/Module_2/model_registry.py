@@ -0,0 +1,250 @@
+"""
+Load models from the MLflow model registry for serving.
+
+`load_model("models:/IrisSKModel/Production")` resolves the stage (or version,
+or `@alias`) to a concrete model version, downloads the artifact once into a
+content-addressed cache on local disk and returns a ready-to-use model:
+
+- an `onnxruntime.InferenceSession` when the artifact contains a `.onnx` file
+- the sklearn pipeline otherwise (MLflow sklearn flavour or a `.joblib` file)
+
+Cache layout (shared by every worker process on the machine):
+
+    <MODEL_CACHE_DIR>/
+        blobs/<sha256>/...          artifact files, keyed by content digest
+        refs/<name>/<version>.json  registry version -> digest
+        refs/<name>/stage-<stage>.json  last resolution of a stage (offline fallback)
+        refs/<name>/@<alias>.json   last resolution of an alias (offline fallback)
+        .lock                       inter-process lock for downloads and eviction
+
+Registry versions are immutable, so once a version has a ref it is never
+downloaded again. Blobs are evicted least-recently-used when the cache grows
+past MODEL_CACHE_MAX_BYTES; a blob used in the last EVICT_GRACE_SECONDS is
+kept, since another worker may still be reading it.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from filelock import FileLock
+
+CACHE_DIR = os.getenv(
+    "MODEL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "model_registry")
+)
+CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(2 * 1024**3)))  # 2 GB
+EVICT_GRACE_SECONDS = 60
+
+_loaded = {}  # (name, version) -> (kind, model), per process
+
+
+# --- URI resolution -------------------------------------------------------
+def parse_model_uri(uri: str):
+    """
+    Split `models:/<name>/<stage-or-version>` or `models:/<name>@<alias>`
+    into (name, selector). The selector keeps its leading '@' for aliases.
+    """
+    if not uri.startswith("models:/"):
+        raise ValueError(f"Not a model registry URI: {uri}")
+    path = uri[len("models:/"):].strip("/")
+    if "@" in path:
+        name, alias = path.split("@", 1)
+        return name, "@" + alias
+    if "/" not in path:
+        raise ValueError(f"Missing stage or version in model URI: {uri}")
+    name, selector = path.rsplit("/", 1)
+    return name, selector
+
+
+def resolve_version(name: str, selector: str) -> str:
+    """Ask the registry which concrete version a stage/alias/version points to."""
+    if selector.isdigit():
+        return selector
+
+    from mlflow.tracking import MlflowClient
+
+    client = MlflowClient()
+    if selector.startswith("@"):
+        return str(client.get_model_version_by_alias(name, selector[1:]).version)
+
+    stages = None if selector.lower() == "latest" else [selector]
+    versions = client.get_latest_versions(name, stages=stages)
+    if not versions:
+        raise LookupError(f"No version of '{name}' in stage '{selector}'")
+    return str(max(int(v.version) for v in versions))
+
+
+# --- cache helpers --------------------------------------------------------
+def _ref_path(name: str, key: str) -> str:
+    return os.path.join(CACHE_DIR, "refs", name, f"{key}.json")
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    """Atomic write so concurrent readers never see a half-written ref."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _dir_digest(path: str) -> str:
+    """sha256 over relative file names and contents, in a stable order."""
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for fname in sorted(files):
+            full = os.path.join(root, fname)
+            h.update(os.path.relpath(full, path).replace(os.sep, "/").encode())
+            with open(full, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+    return h.hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+def _touch(path: str):
+    """Record a use of a blob; eviction order is by this timestamp."""
+    now = time.time()
+    os.utime(path, (now, now))
+
+
+def _evict(keep: str):
+    """Drop least recently used blobs until the cache fits CACHE_MAX_BYTES."""
+    blobs_dir = os.path.join(CACHE_DIR, "blobs")
+    blobs = []
+    for digest in os.listdir(blobs_dir):
+        full = os.path.join(blobs_dir, digest)
+        if os.path.isdir(full):
+            blobs.append((os.path.getmtime(full), _dir_size(full), full))
+
+    total = sum(size for _, size, _ in blobs)
+    recent = time.time() - EVICT_GRACE_SECONDS
+    for used, size, full in sorted(blobs):
+        if total <= CACHE_MAX_BYTES:
+            break
+        if full == keep or used > recent:
+            continue
+        shutil.rmtree(full, ignore_errors=True)
+        total -= size
+        print(f"Evicted cached model artifact {os.path.basename(full)}")
+
+
+def fetch_artifact(name: str, version: str) -> str:
+    """
+    Return a local directory with the artifact of `name` version `version`,
+    downloading it only if no worker has cached it yet.
+    """
+    ref_file = _ref_path(name, version)
+    ref = _read_json(ref_file)
+    if ref and os.path.isdir(ref["path"]):
+        try:
+            _touch(ref["path"])
+            return ref["path"]
+        except FileNotFoundError:
+            pass  # evicted by another worker just now: take the locked path
+
+    os.makedirs(os.path.join(CACHE_DIR, "blobs"), exist_ok=True)
+    with FileLock(os.path.join(CACHE_DIR, ".lock")):
+        # Another worker may have finished the download while we waited
+        ref = _read_json(ref_file)
+        if ref and os.path.isdir(ref["path"]):
+            _touch(ref["path"])
+            return ref["path"]
+
+        import mlflow.artifacts
+
+        tmp_dir = tempfile.mkdtemp(dir=os.path.join(CACHE_DIR, "blobs"), prefix=".dl-")
+        try:
+            local = mlflow.artifacts.download_artifacts(
+                artifact_uri=f"models:/{name}/{version}", dst_path=tmp_dir
+            )
+            digest = _dir_digest(local)
+            blob = os.path.join(CACHE_DIR, "blobs", digest)
+            if os.path.isdir(blob):
+                # Same bytes already cached under another version
+                _touch(blob)
+            else:
+                os.replace(local, blob)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        _write_json(ref_file, {"name": name, "version": version, "digest": digest, "path": blob})
+        _evict(keep=blob)
+    return blob
+
+
+# --- model loading --------------------------------------------------------
+def _open_model(path: str):
+    """Turn an artifact directory into (kind, model)."""
+    files = [
+        os.path.join(root, f) for root, _, names in os.walk(path) for f in sorted(names)
+    ]
+
+    onnx_files = [f for f in files if f.endswith(".onnx")]
+    if onnx_files:
+        import onnxruntime as ort
+
+        sess = ort.InferenceSession(onnx_files[0], providers=["CPUExecutionProvider"])
+        return "onnx", sess
+
+    if os.path.exists(os.path.join(path, "MLmodel")):
+        import mlflow.sklearn
+
+        return "sklearn", mlflow.sklearn.load_model(path)
+
+    joblib_files = [f for f in files if f.endswith(".joblib")]
+    if joblib_files:
+        import joblib
+
+        return "sklearn", joblib.load(joblib_files[0])
+
+    raise ValueError(f"No loadable model found in {path}")
+
+
+def load_model(uri: str):
+    """
+    Resolve a `models:/` URI and return (kind, model) where kind is "onnx"
+    or "sklearn". Results are memoised per process.
+    """
+    name, selector = parse_model_uri(uri)
+    # Aliases keep their '@'; stages get their own prefix so "@Production" and
+    # stage "Production" do not share a ref
+    stage_ref = _ref_path(name, selector if selector.startswith("@") else "stage-" + selector)
+
+    try:
+        version = resolve_version(name, selector)
+    except Exception as e:
+        # Registry unreachable: fall back to what this stage pointed to last time
+        cached = _read_json(stage_ref)
+        if cached is None:
+            raise
+        print(f"Registry lookup failed ({e}); using cached version {cached['version']}")
+        version = cached["version"]
+    else:
+        if not selector.isdigit():
+            _write_json(stage_ref, {"name": name, "version": version})
+
+    key = (name, version)
+    if key not in _loaded:
+        path = fetch_artifact(name, version)
+        _loaded[key] = _open_model(path)
+        print(f"Loaded {name} v{version} ({_loaded[key][0]}) from {path}")
+    return _loaded[key]